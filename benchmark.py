@@ -0,0 +1,861 @@
+"""
+Offline micro-benchmarks and behaviour checks for the helpers. No API keys or network needed.
+
+    python benchmark.py                       # run everything
+    python benchmark.py order_book            # run one benchmark
+    python benchmark.py trigger_orders_check  # run one check; a failed check raises AssertionError
+"""
+import os
+import random
+import sys
+from time import perf_counter
+
+
+def timeit(label: str, func, repeat: int):
+    start = perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (perf_counter() - start) / repeat
+    print(f"{label:<48} {elapsed * 1e6:>10.2f} us")
+    return elapsed
+
+
+def fake_depth(levels: int = 500, mid: float = 60000.0, tick: float = 0.1) -> dict:
+    bids = [[f"{mid - (i + 1) * tick:.1f}", f"{random.uniform(0.01, 2):.5f}"] for i in range(levels)]
+    asks = [[f"{mid + (i + 1) * tick:.1f}", f"{random.uniform(0.01, 2):.5f}"] for i in range(levels)]
+    return {"bids": bids[::-1], "asks": asks, "lastUpdateId": "1"}
+
+
+def bench_order_book():
+    from helpers.order_book import OrderBook, batch_vwap_to_fill, book_metrics
+
+    depth = fake_depth()
+    book = OrderBook.from_depth("BTC_USDC_PERP", depth, "0.1")
+
+    def full_recompute():
+        fresh = OrderBook.from_depth("BTC_USDC_PERP", depth, "0.1")
+        fresh.microprice()
+        fresh.vwap_to_fill("Bid", 50)
+
+    def incremental_update():
+        price = f"{60000 + random.randint(1, 500) * 0.1:.1f}"
+        book.apply_update(asks=[[price, f"{random.uniform(0, 2):.5f}"]])
+        book.microprice()
+        book.vwap_to_fill("Bid", 50)
+
+    timeit("order_book: full recompute (500 levels/side)", full_recompute, 2000)
+    timeit("order_book: incremental update", incremental_update, 2000)
+
+    books = [OrderBook.from_depth(f"S{i}", fake_depth(100), "0.1") for i in range(200)]
+    timeit("order_book: book_metrics (200 books)", lambda: book_metrics(books), 200)
+    timeit("order_book: batch_vwap_to_fill (200 books)", lambda: batch_vwap_to_fill(books, "Bid", [5.0] * 200), 200)
+
+
+def bench_risk():
+    from helpers.risk import RiskEngine, RiskLimits
+
+    engine = RiskEngine(RiskLimits(max_order_notional=1e6, max_symbol_exposure=1e7, max_account_exposure=1e8, max_leverage=10))
+    engine.equity = 1e7
+    for i in range(1000):
+        engine.update_mark(f"S{i}_USDC_PERP", 100.0)
+        engine.on_fill(f"S{i}_USDC_PERP", "Bid", 10, 100.0)
+
+    timeit("risk: check_order (1000 symbols tracked)", lambda: engine.check_order("S500_USDC_PERP", "Bid", 1, 100.0), 100000)
+    timeit("risk: update_mark", lambda: engine.update_mark("S500_USDC_PERP", random.uniform(99, 101)), 100000)
+
+
+class FakePublicClient:
+    """
+    Canned PublicClient responses for `n` spot/perp pairs.
+    """
+
+    def __init__(self, n: int = 150):
+        self.n = n
+
+    def get_markets(self):
+        markets = []
+        for i in range(self.n):
+            for market_type, suffix in (("SPOT", ""), ("PERP", "_PERP")):
+                markets.append({"symbol": f"T{i}_USDC{suffix}", "baseSymbol": f"T{i}", "quoteSymbol": "USDC", "marketType": market_type})
+        return markets
+
+    def get_mark_price(self, symbol: str = None):
+        return [
+            {"symbol": f"T{i}_USDC_PERP", "markPrice": "101", "indexPrice": "100", "fundingRate": f"{random.uniform(-1e-4, 1e-4)}"}
+            for i in range(self.n)
+        ]
+
+    def get_tickers(self, interval: str = None):
+        return [{"symbol": f"T{i}_USDC", "lastPrice": "100"} for i in range(self.n)]
+
+    def get_open_interest(self, symbol: str = None):
+        return [{"symbol": f"T{i}_USDC_PERP", "openInterest": "1000"} for i in range(self.n)]
+
+    def get_funding_interval_rates(self, symbol: str, limit: int = 100, offset: int = 0):
+        return [
+            {"symbol": symbol, "fundingRate": "0.0001", "intervalEndTimestamp": f"2030-01-01T{23 - h:02d}:00:00"}
+            for h in range(min(limit, 24))
+        ]
+
+
+def bench_funding_scanner():
+    from helpers.funding_scanner import FundingScanner
+
+    scanner = FundingScanner(FakePublicClient())
+    timeit("funding_scanner: cold scan (150 pairs)", lambda: FundingScanner(FakePublicClient()).scan(), 20)
+    scanner.scan()
+    timeit("funding_scanner: warm scan (150 pairs)", scanner.scan, 200)
+
+
+def bench_models():
+    import json
+    import tracemalloc
+    from helpers import fast_json
+    from helpers.models import Kline, Market, Trade
+
+    trades = json.dumps([
+        {"id": i, "price": f"{60000 + i % 100:.1f}", "quantity": "0.01234", "quoteQuantity": "740.4",
+         "timestamp": 1700000000000 + i, "isBuyerMaker": i % 2 == 0}
+        for i in range(10000)
+    ]).encode()
+    klines = json.dumps([
+        {"start": "2024-01-01 00:00:00", "end": "2024-01-01 00:01:00", "open": "60000.1", "high": "60010.5",
+         "low": "59990.2", "close": "60005.3", "volume": "12.345", "quoteVolume": "740700.1", "trades": "321"}
+        for _ in range(10000)
+    ]).encode()
+    markets = json.dumps([
+        {"symbol": f"S{i}_USDC_PERP", "baseSymbol": f"S{i}", "quoteSymbol": "USDC", "marketType": "PERP",
+         "orderBookState": "Open", "createdAt": "2024-01-01T00:00:00",
+         "filters": {"price": {"minPrice": "0.01", "maxPrice": "100000", "tickSize": "0.01"},
+                     "quantity": {"minQuantity": "0.01", "maxQuantity": "1000", "stepSize": "0.01"}}}
+        for i in range(200)
+    ]).encode()
+
+    timeit(f"models: trades decode json (10k rows)", lambda: json.loads(trades.decode()), 20)
+    timeit(f"models: trades decode {fast_json.BACKEND}", lambda: fast_json.loads(trades), 20)
+
+    # Both paths decode with the same backend, so only the model cost is compared.
+    for label, payload, model, field, repeat in (
+        ("trades", trades, Trade, "price", 20),
+        ("klines", klines, Kline, "close", 20),
+        ("markets", markets, Market, "tick_size", 500),
+    ):
+        key = model._fields[field]
+        for passes in (1, 5):
+            def dict_path():
+                rows = fast_json.loads(payload)
+                if model is Market:
+                    return [sum(float(row["filters"]["price"]["tickSize"]) for row in rows) for _ in range(passes)]
+                return [sum(float(row[key]) for row in rows) for _ in range(passes)]
+
+            def model_path():
+                rows = model.from_list(fast_json.loads(payload))
+                return [sum(getattr(row, field) for row in rows) for _ in range(passes)]
+
+            timeit(f"models: {label} dicts, decode + {passes} read(s)", dict_path, repeat)
+            timeit(f"models: {label} {model.__name__}, decode + {passes} read(s)", model_path, repeat)
+
+        for name, build in (("dicts", lambda: fast_json.loads(payload)), (model.__name__, lambda: model.from_list(fast_json.loads(payload)))):
+            tracemalloc.start()
+            rows = build()
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"models: {label} retained as {name:<8} {size / 1024:>28.0f} KiB")
+            del rows
+
+
+def bench_trigger_orders():
+    from helpers.trigger_orders import TriggerManager
+
+    manager = TriggerManager(on_fire=lambda trigger: None)
+    for i in range(5000):
+        manager.bracket("BTC_USDC_PERP", "Ask", 0.01, 50000 - i, 70000 + i)
+        manager.trailing_stop("BTC_USDC_PERP", "Ask", 0.01, 5 + i % 10, 60000)
+    prices = [random.uniform(59000, 61000) for _ in range(10000)]
+    ticks = iter(prices)
+
+    print(f"trigger_orders: {len(manager.triggers)} live triggers")
+    timeit("trigger_orders: on_mark_price (no fills)", lambda: manager.on_mark_price("BTC_USDC_PERP", next(ticks), now=0), 10000)
+
+
+def check_trigger_orders():
+    """
+    Random stops, brackets and trailing stops with cancels, against a brute-force model that
+    rescans every live trigger on each tick.
+    """
+    from helpers.trigger_orders import TriggerManager
+
+    rng = random.Random(7)
+    fired = []
+    manager = TriggerManager(on_fire=fired.append)
+    model = {}  # id -> [trigger, best price seen]
+    price, total = 60000.0, 0
+    for _ in range(3000):
+        side = rng.choice(("Ask", "Bid"))
+        kind = rng.random()
+        if kind < 0.6:
+            trigger = manager.trailing_stop("BTC_USDC_PERP", side, 0.01, rng.uniform(0.1, 5), price)
+            model[trigger.id] = [trigger, price]
+        elif kind < 0.8:
+            low, high = price * rng.uniform(0.9, 0.999), price * rng.uniform(1.001, 1.1)
+            stop, take_profit = manager.bracket("BTC_USDC_PERP", side, 0.01, *((low, high) if side == "Ask" else (high, low)))
+            model[stop.id], model[take_profit.id] = [stop, None], [take_profit, None]
+        elif model:
+            victim = rng.choice(list(model))
+            manager.cancel(victim)
+            model.pop(victim)
+        price *= 1 + rng.gauss(0, 0.002)
+
+        expected = set()
+        for trigger, best in model.values():
+            if trigger.kind == "trailing_stop":
+                direction = 1 if trigger.side == "Ask" else -1
+                best = max(best, price) if direction == 1 else min(best, price)
+                model[trigger.id][1] = best
+                if trigger.trail <= direction * (1 - price / best):
+                    expected.add(trigger.id)
+            else:
+                above = (trigger.side == "Bid") == (trigger.kind == "stop")
+                if (price >= trigger.level) if above else (price <= trigger.level):
+                    expected.add(trigger.id)
+        fired.clear()
+        manager.on_mark_price("BTC_USDC_PERP", price, now=0)
+        assert {t.id for t in fired} == expected, (price, sorted(expected), sorted(t.id for t in fired))
+        for trigger in fired:
+            model.pop(trigger.id)
+            for linked in trigger.linked:
+                model.pop(linked.id, None)
+        assert set(manager.triggers) == set(model)
+        total += len(fired)
+    levels = manager._levels.get("BTC_USDC_PERP")
+    assert levels is None or len(levels) == sum(t.kind != "trailing_stop" for t, _ in model.values())
+    print(f"trigger_orders_check: 3000 ticks match the brute-force model ({total} fired, {len(model)} left)")
+
+
+class SimulatedExchange:
+    """
+    Single-market exchange with a resilient book: taken liquidity refills with time constant `resilience`
+    seconds and every fill moves the mid by `impact` per unit traded. Serves as both client and public client.
+    """
+
+    def __init__(self, mid: float = 100.0, tick: float = 0.01, level_quantity: float = 5.0, levels: int = 500, resilience: float = 30.0, impact: float = 0.001):
+        self.mid, self.tick, self.level_quantity, self.levels = mid, tick, level_quantity, levels
+        self.resilience, self.impact = resilience, impact
+        self.clock = 0.0
+        self.taken = {"Bid": [0.0] * levels, "Ask": [0.0] * levels}
+        self.order_id = 0
+
+    def now(self) -> float:
+        return self.clock
+
+    def sleep(self, seconds: float):
+        import math
+        decay = math.exp(-seconds / self.resilience)
+        self.clock += seconds
+        for taken in self.taken.values():
+            taken[:] = [t * decay for t in taken]
+
+    def _price(self, side: str, level: int) -> float:
+        offset = (level + 1) * self.tick
+        return self.mid + offset if side == "Bid" else self.mid - offset
+
+    def get_depth(self, symbol: str):
+        asks = [[f"{self._price('Bid', i):.2f}", f"{self.level_quantity - self.taken['Bid'][i]:.6f}"] for i in range(self.levels)]
+        bids = [[f"{self._price('Ask', i):.2f}", f"{self.level_quantity - self.taken['Ask'][i]:.6f}"] for i in range(self.levels)]
+        return {"asks": asks, "bids": bids[::-1], "lastUpdateId": str(self.order_id)}
+
+    def execute_order(self, orderType, side, symbol, quantity=None, price=None, timeInForce=None, **kwargs):
+        self.order_id += 1
+        remaining, notional = float(quantity), 0.0
+        taken = self.taken[side]
+        for i in range(self.levels):
+            level_price = self._price(side, i)
+            if price is not None and (level_price > float(price) if side == "Bid" else level_price < float(price)):
+                break
+            fill = min(remaining, self.level_quantity - taken[i])
+            taken[i] += fill
+            remaining -= fill
+            notional += fill * level_price
+            if remaining <= 1e-12:
+                break
+        executed = float(quantity) - remaining
+        self.mid += self.impact * executed * (1 if side == "Bid" else -1)
+        return {"id": str(self.order_id), "executedQuantity": str(executed), "executedQuoteQuantity": str(notional), "status": "Filled"}
+
+
+def bench_execution():
+    from helpers.execution import TWAP, VWAP, ExecutionAlgo
+
+    class SingleShot(ExecutionAlgo):
+        def slices(self):
+            yield 0, self.quantity
+
+    quantity = 400.0
+    for name, algo in (
+        ("single shot", lambda ex: SingleShot(ex, "SIM", "Bid", quantity, "0.01", "0.01", public_client=ex, max_slippage=1, sleep=ex.sleep, clock=ex.now)),
+        ("TWAP 10 x 60s", lambda ex: TWAP(ex, "SIM", "Bid", quantity, "0.01", "0.01", public_client=ex, max_slippage=0.01, sleep=ex.sleep, clock=ex.now, duration=600, num_slices=10)),
+        ("VWAP 10 x 60s front-loaded", lambda ex: VWAP(ex, "SIM", "Bid", quantity, "0.01", "0.01", public_client=ex, max_slippage=0.01, sleep=ex.sleep, clock=ex.now, duration=600, profile=[3, 2, 1, 1, 1, 1, 1, 1, 1, 1])),
+    ):
+        exchange = SimulatedExchange()
+        start = perf_counter()
+        report = algo(exchange).run()
+        elapsed = perf_counter() - start
+        print(
+            f"execution: {name:<28} filled {report.filled_quantity:>6.1f}/{quantity:.0f}  "
+            f"shortfall {report.implementation_shortfall * 1e4:>7.1f} bps  ({elapsed * 1e3:.1f} ms simulated)"
+        )
+
+
+class FlakyRestingExchange:
+    """
+    Resting limit orders that fill at random on a simulated clock. `error_rate` of all calls fail
+    before doing anything, and fills only show in `get_fill_history` `lag` seconds after they happen.
+    """
+
+    def __init__(self, seed: int, error_rate: float = 0.3, lag: float = 20.0, fill_rate: float = 0.05):
+        self.random = random.Random(seed)
+        self.error_rate, self.lag, self.fill_rate = error_rate, lag, fill_rate
+        self.clock = 0.0
+        self.orders = {}  # id -> [quantity, executed]
+        self.fills = []  # (timestamp, order id, quantity)
+        self.filled = 0.0
+        self.order_id = 0
+
+    def now(self) -> float:
+        return self.clock
+
+    def _maybe_fail(self):
+        if self.random.random() < self.error_rate:
+            raise Exception("HTTP Error 503: Service Unavailable")
+
+    def sleep(self, seconds: float):
+        self.clock += seconds
+        for order_id, order in self.orders.items():
+            if self.random.random() < min(self.fill_rate * seconds, 1.0):
+                quantity = min(order[0] - order[1], round(self.random.uniform(0.1, 1.0) * order[0], 2))
+                if quantity > 0:
+                    order[1] += quantity
+                    self.filled += quantity
+                    self.fills.append((self.clock, order_id, quantity))
+        self.orders = {k: v for k, v in self.orders.items() if v[1] < v[0] - 1e-12}
+
+    def execute_order(self, orderType, side, symbol, quantity=None, price=None, **kwargs):
+        self._maybe_fail()
+        self.order_id += 1
+        self.orders[str(self.order_id)] = [float(quantity), 0.0]
+        return {"id": str(self.order_id), "executedQuantity": "0", "status": "New"}
+
+    def get_open_order(self, symbol, orderId):
+        self._maybe_fail()
+        if orderId not in self.orders:
+            raise Exception("HTTP Error 404: RESOURCE_NOT_FOUND")
+        return {"id": orderId}
+
+    def cancel_open_order(self, symbol, orderId):
+        self._maybe_fail()
+        order = self.orders.pop(orderId, None)
+        if order is None:
+            raise Exception("HTTP Error 404: RESOURCE_NOT_FOUND")
+        return {"id": orderId, "executedQuantity": str(order[1])}
+
+    def get_fill_history(self, symbol, orderId, limit=1000):
+        self._maybe_fail()
+        visible = [f for f in self.fills if f[1] == orderId and f[0] <= self.clock - self.lag]
+        return [{"quantity": str(q), "price": "100", "fee": "0"} for _, _, q in visible]
+
+
+def check_iceberg():
+    """
+    Iceberg against an exchange where 30% of calls fail and fills show up late: the parent is
+    never over-filled and the run ends on the simulated clock.
+    """
+    import logging
+
+    from helpers.execution import Iceberg
+
+    logging.disable(logging.CRITICAL)
+    filled = 0
+    try:
+        for seed in range(200):
+            exchange = FlakyRestingExchange(seed)
+            algo = Iceberg(
+                exchange, "SIM", "Bid", 10.0, "0.01", "0.01", arrival_price=100, sleep=exchange.sleep,
+                clock=exchange.now, limit_price=100, display_quantity=2.0, interval=5, duration=600,
+            )
+            start = perf_counter()
+            report = algo.run()
+            elapsed = perf_counter() - start
+            assert exchange.filled <= 10.0 + 1e-9, (seed, exchange.filled)
+            assert report.filled_quantity <= exchange.filled + 1e-9, (seed, report.filled_quantity, exchange.filled)
+            # Clips only rest while polled, so the run ends within a few intervals of the deadline.
+            assert exchange.clock <= 600 + 5 * 5, (seed, exchange.clock)
+            assert elapsed < 1.0, (seed, elapsed)
+            filled += exchange.filled >= 10.0 - 1e-9
+    finally:
+        logging.disable(logging.NOTSET)
+    print(f"iceberg_check: 200 runs at 30% errors with {exchange.lag:.0f}s fill lag, none over-filled, {filled} fully filled")
+
+
+def bench_portfolio():
+    import base64
+    import os
+    from time import sleep
+    from helpers.portfolio import PortfolioAggregator
+
+    latency = 0.02
+    accounts = [
+        {"name": f"acct{i}", "api_key": "key", "api_secret": base64.b64encode(os.urandom(32)).decode()}
+        for i in range(300)
+    ]
+
+    def fake_send_request(method, endpoint, action, params=None):
+        sleep(latency)
+        if action == "collateralQuery":
+            return {"netEquity": f"{random.uniform(900, 1100):.2f}", "netEquityAvailable": "500"}
+        if action == "balanceQuery":
+            return {"USDC": {"available": "500", "locked": "0", "staked": "0"}, "SOL": {"available": "1", "locked": "0", "staked": "0"}}
+        if action == "positionQuery":
+            return [{"symbol": "BTC_USDC_PERP", "netQuantity": "-0.01", "netExposureNotional": "600", "pnlUnrealized": "1.5"}]
+        return [{"pnlRealized": "0.5"}] * 10
+
+    changes = []
+    aggregator = PortfolioAggregator(accounts, requests_per_second=10, max_workers=64, on_change=changes.extend)
+    for client in aggregator.clients.values():
+        client._send_request = fake_send_request
+
+    start = perf_counter()
+    aggregator.refresh()
+    first = perf_counter() - start
+    first_changes = len(changes)
+    changes.clear()
+    start = perf_counter()
+    aggregator.refresh()
+    second = perf_counter() - start
+    print(f"portfolio: 300 accounts x 4 calls @ {latency * 1e3:.0f} ms   first refresh {first:.2f} s ({first_changes} changes)")
+    print(f"portfolio: second refresh                    {second:.2f} s ({len(changes)} changes: equity and margin usage moved)")
+
+
+class AccountsTransport:
+    """
+    Answers the portfolio endpoints for several accounts, told apart by API key. Accounts named in
+    `failing` answer 503. PnL history is served newest first in `limit`/`offset` pages.
+    """
+
+    def __init__(self, pnl: dict):
+        self.pnl = pnl  # api key -> [pnl entries, newest first]
+        self.failing = set()
+        self.pnl_pages = 0
+
+    def request(self, method, url, headers=None, params=None, data=None):
+        import json
+        from helpers.transport import TransportResponse
+        key = headers["X-API-Key"]
+        if key in self.failing:
+            return TransportResponse(503, b"Service Unavailable")
+        endpoint = url.split("backpack.exchange/")[1]
+        if endpoint == "wapi/v1/history/pnl":
+            self.pnl_pages += 1
+            offset, limit = int(params["offset"]), int(params["limit"])
+            body = self.pnl[key][offset:offset + limit]
+        else:
+            body = {
+                "api/v1/capital/collateral": {"netEquity": "1000", "netEquityAvailable": "400"},
+                "api/v1/capital": {"USDC": {"available": "1000", "locked": "0", "staked": "0"}},
+                "api/v1/position": [{"symbol": "SOL_USDC_PERP", "netQuantity": "2", "netExposureNotional": "300", "pnlUnrealized": "4"}],
+            }[endpoint]
+        return TransportResponse(200, json.dumps(body).encode())
+
+
+def check_portfolio():
+    """
+    Two accounts through a shared transport: realized PnL covers the whole paged history, an account
+    that fails and recovers unchanged reports nothing, and new PnL entries only move realized_pnl.
+    """
+    import base64
+    import logging
+
+    from helpers.portfolio import PortfolioAggregator
+
+    def entries(start, n):
+        # Newest first, two entries per timestamp so pages and refreshes split ties.
+        return [{"symbol": "SOL_USDC_PERP", "pnlRealized": f"{(i % 7) - 3}.25", "timestamp": f"2026-01-01T00:{i // 2:04d}"} for i in range(start + n - 1, start - 1, -1)]
+
+    secret = base64.b64encode(bytes(32)).decode()
+    accounts = [{"name": name, "api_key": name, "api_secret": secret} for name in ("a", "b")]
+    transport = AccountsTransport({"a": entries(0, 251), "b": entries(0, 30)})
+    changes = []
+    aggregator = PortfolioAggregator(accounts, requests_per_second=1000, pnl_history=100, on_change=changes.extend, transport=transport)
+
+    def full(name):
+        return sum(float(e["pnlRealized"]) for e in transport.pnl[name])
+
+    logging.disable(logging.CRITICAL)
+    try:
+        snapshot = aggregator.refresh()
+        assert snapshot.realized_pnl.tolist() == [full("a"), full("b")], snapshot.realized_pnl
+        changes.clear()
+
+        transport.failing.add("b")
+        snapshot = aggregator.refresh()
+        assert snapshot.errors.keys() == {"b"} and changes == [], changes
+        transport.failing.clear()
+        snapshot = aggregator.refresh()
+        assert not snapshot.errors and changes == [], changes
+
+        # The newest timestamp already counted gets one more entry, plus a few later ones.
+        transport.pnl["a"] = entries(251, 5) + transport.pnl["a"]
+        transport.pnl_pages = 0
+        aggregator.refresh()
+        assert changes == [("a", "realized_pnl", full("a") - sum(float(e["pnlRealized"]) for e in transport.pnl["a"][:5]), full("a"))], changes
+        assert transport.pnl_pages == 2, transport.pnl_pages  # one page per account
+    finally:
+        logging.disable(logging.NOTSET)
+    print(f"portfolio_check: failed-and-recovered account silent, realized PnL over all {len(transport.pnl['a'])} entries")
+
+
+class CannedTransport:
+    """
+    Transport answering the endpoints a bot cycle uses with fixed bodies, for recording without a network.
+    """
+
+    BODIES = {
+        "api/v1/orders": [{"id": "1", "symbol": "BTC_USDC_PERP"}],
+        "api/v1/order": {"id": "2", "status": "Filled", "executedQuantity": "0.01", "executedQuoteQuantity": "600"},
+        "api/v1/position": [{"symbol": "BTC_USDC_PERP", "netQuantity": "-0.01"}],
+        "api/v1/market": {"symbol": "BTC_USDC_PERP", "filters": {"price": {"tickSize": "0.1"}, "quantity": {"stepSize": "0.0001"}}},
+        "api/v1/markPrices": [{"symbol": "BTC_USDC_PERP", "markPrice": "60000", "indexPrice": "59990", "fundingRate": "0.0001"}],
+    }
+
+    def request(self, method, url, headers=None, params=None, data=None):
+        import json
+        from helpers.transport import TransportResponse
+        endpoint = url.split("backpack.exchange/")[1]
+        return TransportResponse(200, json.dumps(self.BODIES[endpoint]).encode())
+
+
+def bench_replay():
+    import base64
+    import os
+    import tempfile
+    from helpers.backpack_exchange import BackpackExchange
+    from helpers.public_API import PublicClient
+    from helpers.orders import close_all_orders, close_all_positions
+    from helpers.transport import RecordingTransport, ReplayTransport
+
+    secret = base64.b64encode(os.urandom(32)).decode()
+
+    def bot_cycle(transport):
+        client, public_client = BackpackExchange("key", secret, transport), PublicClient(transport)
+        for _ in range(100):
+            close_all_orders(client)
+            close_all_positions(client)
+            public_client.get_market("BTC_USDC_PERP")
+            public_client.get_mark_price("BTC_USDC_PERP")
+
+    path = os.path.join(tempfile.mkdtemp(), "session.jsonl.gz")
+    recorder = RecordingTransport(path, inner=CannedTransport())
+    bot_cycle(recorder)
+    recorder.close()
+
+    replay = ReplayTransport(path, strict=True)
+    start = perf_counter()
+    bot_cycle(replay)
+    elapsed = perf_counter() - start
+    print(f"replay: {len(replay.records)} requests in {os.path.getsize(path)} bytes, "
+          f"replayed in {elapsed * 1e3:.1f} ms ({len(replay.records) / elapsed:.0f} req/s), finished={replay.finished}")
+
+
+class ScannerTransport:
+    """
+    Serves `FakePublicClient` data over HTTP after a random delay, so concurrent requests complete
+    (and are recorded) in a different order from the one they were sent in.
+    """
+
+    def __init__(self, n: int = 40):
+        self.public = FakePublicClient(n)
+
+    def request(self, method, url, headers=None, params=None, data=None):
+        import json
+        import time
+        from helpers.transport import TransportResponse
+        time.sleep(random.uniform(0, 0.003))
+        endpoint, params = url.split("backpack.exchange/")[1], params or {}
+        body = {
+            "api/v1/markets": lambda: self.public.get_markets(),
+            "api/v1/markPrices": lambda: self.public.get_mark_price(),
+            "api/v1/tickers": lambda: self.public.get_tickers(),
+            "api/v1/openInterest": lambda: self.public.get_open_interest(),
+            "api/v1/fundingRates": lambda: self.public.get_funding_interval_rates(params["symbol"], int(params["limit"])),
+        }[endpoint]()
+        return TransportResponse(200, json.dumps(body).encode())
+
+
+def check_replay():
+    """
+    A threaded funding scan replays under any interleaving, a truncated gzip recording replays up
+    to its last complete record, and replay sleeps follow the replay speed.
+    """
+    import logging
+    import tempfile
+    from helpers.funding_scanner import FundingScanner
+    from helpers.public_API import PublicClient
+    from helpers.transport import RecordingTransport, ReplayTransport
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "scan.jsonl.gz")
+    recorder = RecordingTransport(path, inner=ScannerTransport())
+    recorded = FundingScanner(PublicClient(recorder), max_workers=16).scan()
+    recorder.close()
+    for _ in range(5):
+        replay = ReplayTransport(path, strict=True)
+        assert FundingScanner(PublicClient(replay), max_workers=16).scan() == recorded
+        assert replay.finished
+
+    # Cut the stream mid-way, as a crash would: no gzip trailer and a partial last line.
+    with open(path, "rb") as f:
+        data = f.read()
+    truncated = os.path.join(directory, "truncated.jsonl.gz")
+    with open(truncated, "wb") as f:
+        f.write(data[:len(data) * 2 // 3])
+    complete = ReplayTransport(path).records
+    logging.disable(logging.WARNING)
+    try:
+        records = ReplayTransport(truncated).records
+    finally:
+        logging.disable(logging.NOTSET)
+    assert 0 < len(records) < len(complete), (len(records), len(complete))
+    assert records == complete[:len(records)]
+
+    start = perf_counter()
+    ReplayTransport(path).sleep(3600)
+    ReplayTransport(path, speed=3600).sleep(0.36)
+    assert perf_counter() - start < 0.05, perf_counter() - start
+    print(f"replay_check: threaded scan of {len(recorded)} pairs replayed 5 times, "
+          f"truncated recording gave {len(records)}/{len(complete)} records, replay sleeps scaled")
+
+
+class StartupTransport:
+    """
+    Answers the calls `start.py` and `fcfs.py` make before their first order, then exits the process
+    as soon as that order is sent so the parent can time it.
+    """
+
+    BODIES = {
+        "api/v1/account": None,
+        "api/v1/orders": [],
+        "api/v1/position": [],
+        "api/v1/capital/collateral": {"netEquity": "1000"},
+        "api/v1/account/limits/order": {"maxOrderQuantity": "100"},
+        "api/v1/market": {"symbol": "X", "filters": {"price": {"tickSize": "0.01"}, "quantity": {"stepSize": "0.01", "minQuantity": "0.01"}}},
+        "api/v1/markPrices": [{"symbol": "X", "markPrice": "100", "indexPrice": "100", "fundingRate": "0"}],
+        "api/v1/depth": {"bids": [["99.9", "100"]], "asks": [["100.1", "100"]], "lastUpdateId": "1"},
+        "wapi/v1/history/fills": [],
+        "wapi/v1/history/funding": [],
+    }
+
+    def request(self, method, url, headers=None, params=None, data=None):
+        import json
+        from helpers.transport import TransportResponse
+        endpoint = url.split("backpack.exchange/")[1]
+        if method == "POST" and endpoint == "api/v1/order":
+            os._exit(0)
+        body = self.BODIES[endpoint]
+        return TransportResponse(204, b"") if body is None else TransportResponse(200, json.dumps(body).encode())
+
+    def sleep(self, seconds: float):
+        pass
+
+    def close(self):
+        pass
+
+
+def bench_startup():
+    import base64
+    import shutil
+    import subprocess
+    import tempfile
+
+    repo = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp()
+    shutil.copy(os.path.join(repo, "settings.json"), workdir)
+    env = dict(os.environ, API_KEY="key", API_SECRET=base64.b64encode(os.urandom(32)).decode(), PYTHONPATH=repo)
+
+    for script in ("start.py", "fcfs.py"):
+        child = (
+            "import runpy, benchmark, helpers.transport as transport\n"
+            "transport.transport_from_env = benchmark.StartupTransport\n"
+            f"runpy.run_path({os.path.join(repo, script)!r}, run_name='__main__')\n"
+        )
+        runs = []
+        for _ in range(5):
+            start = perf_counter()
+            subprocess.run([sys.executable, "-c", child], cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL)
+            runs.append(perf_counter() - start)
+        print(f"startup: {script:<8} time to first order (process start, best of 5) {min(runs) * 1e3:>8.1f} ms")
+
+
+class MockExchangeTransport:
+    """
+    Fills every order at its limit price; enough of an exchange to measure the client-side cost of an order.
+    """
+
+    def request(self, method, url, headers=None, params=None, data=None):
+        import json
+        from helpers.transport import TransportResponse
+        order = json.loads(data)
+        body = dict(order, id="1", status="Filled", executedQuantity=order["quantity"],
+                    executedQuoteQuantity=str(float(order["quantity"]) * float(order["price"])))
+        return TransportResponse(200, json.dumps(body).encode())
+
+
+def mock_exchange_client(account=None):
+    import base64
+    from helpers.backpack_exchange import BackpackExchange
+    return BackpackExchange("key", base64.b64encode(bytes(range(32))).decode(), MockExchangeTransport())
+
+
+def every_tick_strategy(symbol, price, quantity, timestamp):
+    return {"orderType": "Limit", "side": "Bid", "symbol": symbol, "price": f"{price:.2f}", "quantity": "0.01", "timeInForce": "IOC"}
+
+
+def lapping_writer(ring_name: str, capacity: int, writes: int):
+    from helpers.runtime import RingBuffer
+    ring = RingBuffer(capacity, name=ring_name)
+    for seq in range(writes):
+        ring.write(seq % 1000, float(seq), float(seq), float(seq))
+    ring.close()
+
+
+def check_runtime():
+    """
+    A writer process laps an 8-slot ring 300k times while this process reads it: every tick read
+    is whole (all fields from the same write). On a single CPU the two only race on preemption,
+    so a slot frozen mid-write is checked too. Then approved orders reserve their notional until
+    the worker reports back.
+    """
+    import multiprocessing
+    from helpers.risk import RiskEngine, RiskLimits
+    from helpers.runtime import RingBuffer, ShardedRuntime
+
+    writes, capacity = 300_000, 8
+    ring = RingBuffer(capacity)
+    writer = multiprocessing.Process(target=lapping_writer, args=(ring.name, capacity, writes))
+    writer.start()
+    cursor, read, lost = 0, 0, 0
+    while writer.is_alive() or cursor < writes:
+        ticks, cursor, dropped = ring.read(cursor)
+        seq = ticks["seq"].astype(float)
+        assert (ticks["price"] == seq).all() and (ticks["quantity"] == seq).all() and (ticks["timestamp"] == seq).all(), ticks
+        assert (ticks["symbol"] == ticks["seq"] % 1000).all(), ticks
+        read, lost = read + len(ticks), lost + dropped
+        if cursor >= writes:
+            break
+    writer.join()
+    ring.close()
+    assert read + lost == writes, (read, lost)
+
+    # Freeze a writer half-way through a slot: the reader must drop that slot, not return a mix.
+    ring = RingBuffer(4)
+    for seq in range(6):
+        ring.write(seq, float(seq), float(seq), float(seq))
+    ring.slots["seq"][6 % 4] = -1
+    ring.slots["price"][6 % 4] = 6.0
+    ticks, cursor, dropped = ring.read(2)
+    assert ticks["seq"].tolist() == [3, 4, 5] and (cursor, dropped) == (6, 1), (ticks, cursor, dropped)
+    ring.close()
+
+    engine = RiskEngine(RiskLimits(max_symbol_exposure=250))
+    runtime = ShardedRuntime(["X_USDC_PERP"], every_tick_strategy, mock_exchange_client, num_workers=3, risk_engine=engine)
+    order = {"symbol": "X_USDC_PERP", "side": "Bid", "price": "100", "quantity": "1"}
+    runtime.generations = [0, 0, 0]
+    assert runtime._approve(order, ("pending", 0, 0))[0]
+    assert runtime._approve(order, ("pending", 1, 0))[0]
+    approved, reason = runtime._approve(order, ("pending", 2, 0))
+    assert not approved and "exposure" in reason, reason
+    runtime._release(0, 0)
+    assert runtime._approve(order, ("pending", 2, 0))[0]
+    print(f"runtime_check: {read} ticks read whole while lapped ({lost} dropped), third 100 USDC order over a 250 limit rejected until one was released")
+
+
+def bench_runtime():
+    from helpers.runtime import ShardedRuntime
+
+    symbols = [f"S{i}_USDC_PERP" for i in range(64)]
+    ticks = 4000
+    print(f"runtime: {os.cpu_count()} CPU(s) available")
+    for num_workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        runtime = ShardedRuntime(symbols, every_tick_strategy, mock_exchange_client, num_workers=num_workers)
+        runtime.start()
+        runtime.wait_ready()
+
+        start = perf_counter()
+        for i in range(ticks):
+            runtime.publish(symbols[i % len(symbols)], 100.0 + i % 7)
+            if i % 64 == 0:
+                runtime.pump()
+        while runtime.fills + runtime.errors < ticks and perf_counter() - start < 60:
+            runtime.pump(timeout=0.01)
+        elapsed = perf_counter() - start
+        runtime.stop()
+        print(f"runtime: {num_workers} worker(s)  {runtime.fills} orders signed and sent in {elapsed:.2f} s  ({runtime.fills / elapsed:>7.0f} orders/s)")
+
+
+def bench_campaign():
+    from datetime import datetime, timedelta
+    from helpers.campaign import CampaignLedger, CampaignPlanner, klines_to_arrays, simulate
+
+    # 30 days of 1m klines per symbol, as PublicClient.get_klines returns them.
+    symbols = ["SOL_USDC_PERP", "BTC_USDC_PERP", "ETH_USDC_PERP"]
+    start = datetime(2024, 1, 1)
+    prices = {}
+    for symbol in symbols:
+        price, klines = 100.0, []
+        for minute in range(30 * 24 * 60):
+            price *= 1 + random.gauss(0, 0.0005)
+            klines.append({"start": (start + timedelta(minutes=minute)).isoformat(sep=" "), "close": f"{price:.4f}"})
+        prices[symbol] = klines_to_arrays(klines)
+
+    planner = CampaignPlanner(
+        target_volume=5_000_000, budget=2_500, cost_rates={"SOL_USDC_PERP": 0.0004, "BTC_USDC_PERP": 0.0005, "ETH_USDC_PERP": 0.0006},
+        accounts=[f"acc{i}" for i in range(10)], trade_size=(100, 200), min_sleep=60, max_sleep=300, max_share=0.5, seed=1,
+    )
+    plan = planner.plan(start.timestamp())
+    print(f"campaign: {len(plan)} round trips planned")
+    timeit("campaign plan 5M volume, 10 accounts", lambda: planner.plan(start.timestamp()), 3)
+    timeit("campaign simulate plan over 30d of 1m klines", lambda: simulate(plan, prices, 0.0002, 0.0005), 3)
+    result = simulate(plan, prices, 0.0002, 0.0005)
+    print(f"campaign: simulated volume {result['volume']:.0f}, cost {result['cost']:.2f} ({result['cost_per_volume'] * 100:.4f}% per $)")
+
+    ledger = CampaignLedger()
+    fills = [
+        {"tradeId": i, "symbol": "SOL_USDC_PERP", "side": "Bid" if i % 2 else "Ask", "quantity": "1", "price": f"{100 + i % 3}", "fee": "0.02", "feeSymbol": "USDC"}
+        for i in range(10_000)
+    ]
+    timeit("campaign ledger ingest 10000 fills", lambda: CampaignLedger().ingest_fills(fills), 3)
+    ledger.ingest_fills(fills)
+    timeit("campaign replan from ledger", lambda: planner.replan(ledger, start.timestamp()), 3)
+
+
+BENCHMARKS = {
+    "order_book": bench_order_book,
+    "risk": bench_risk,
+    "funding_scanner": bench_funding_scanner,
+    "models": bench_models,
+    "trigger_orders": bench_trigger_orders,
+    "trigger_orders_check": check_trigger_orders,
+    "execution": bench_execution,
+    "iceberg_check": check_iceberg,
+    "portfolio": bench_portfolio,
+    "portfolio_check": check_portfolio,
+    "replay": bench_replay,
+    "replay_check": check_replay,
+    "startup": bench_startup,
+    "runtime": bench_runtime,
+    "runtime_check": check_runtime,
+    "campaign": bench_campaign,
+}
+
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -1,13 +1,36 @@
 from os import getenv
 from dotenv import load_dotenv
-from time import sleep
 from helpers.backpack_exchange import BackpackExchange
 from helpers.public_API import PublicClient
+from helpers.transport import transport_from_env
 from helpers.format_types import OrderSide, OrderType
+from helpers.order_book import OrderBook
 
 load_dotenv()
 
 
+def cap_to_slippage(public_client: PublicClient, pairs: str, side: str, amount: float, max_slippage_percentage: float):
+    """
+    Shrink a market order's quote amount so its expected average price stays within `max_slippage_percentage` of the best price.
+    Raises when the book is empty or the capped amount is below the market's minimum order size.
+    """
+    filters = public_client.get_market(symbol=pairs)["filters"]
+    book = OrderBook.from_depth(pairs, public_client.get_depth(pairs), filters["price"]["tickSize"])
+    best = book.best_ask if side == OrderSide.BUY.value else book.best_bid
+    if best is None:
+        raise Exception(f"{pairs}: order book is empty on the {side} side, no order sent")
+
+    max_amount = book.max_quote_for_slippage(side, max_slippage_percentage / 100)
+    if max_amount < amount:
+        print(f"⚠️ {pairs}: book only takes {max_amount:.2f} USDC within {max_slippage_percentage}% slippage, sizing down from {amount}")
+        amount = float(f"{max_amount:.2f}")
+
+    min_amount = float(filters["quantity"]["minQuantity"]) * best
+    if amount <= 0 or amount < min_amount:
+        raise Exception(f"{pairs}: {amount} USDC is below the minimum order size (~{min_amount:.2f} USDC), no order sent")
+    return amount
+
+
 def BUY_MARKET(client: BackpackExchange, pairs: str, amount: str):
     order_status = client.execute_order(
         symbol = pairs,
@@ -50,8 +73,11 @@ if __name__ == "__main__":
     
     ### SETTING ######
     AMOUNT_USDC = 5
+    MAX_SLIPPAGE_PERCENTAGE = 0.5
     PAIRS_SPOT = "ES_USDC"
     PAIRS_PERP = "ES_USDC_PERP"
+    AUTO_SELECT_PAIR = False  # True: hedge the spot/perp pair with the best funding + basis instead
+    MIN_OPEN_INTEREST_USDC = 100000
     #####################
 
     API_KEY = getenv("API_KEY")
@@ -61,15 +87,33 @@ if __name__ == "__main__":
         print("API_KEY or API_SECRET is not set.")
         exit(1)
 
+    transport = None
     try:
-        public_client = PublicClient()
-        client = BackpackExchange(API_KEY, API_SECRET)
+        transport = transport_from_env()
+        public_client = PublicClient(transport)
+        client = BackpackExchange(API_KEY, API_SECRET, transport)
+
+        if AUTO_SELECT_PAIR:
+            from helpers.funding_scanner import FundingScanner  # only needed when scanning
+
+            best = FundingScanner(public_client).best_hedge(min_open_interest=MIN_OPEN_INTEREST_USDC)
+            if not best:
+                print("No spot/perp pair matches MIN_OPEN_INTEREST_USDC.")
+                exit(1)
+            PAIRS_SPOT, PAIRS_PERP = best["spot_symbol"], best["symbol"]
+            print(f"Selected {PAIRS_SPOT} / {PAIRS_PERP}: funding APR {best['funding_apr']:.2%}, basis {best['basis']:.3%}")
+
+        # Size both legs to the thinner book so the hedge stays balanced.
+        AMOUNT_USDC = min(
+            cap_to_slippage(public_client, PAIRS_SPOT, OrderSide.BUY.value, AMOUNT_USDC, MAX_SLIPPAGE_PERCENTAGE),
+            cap_to_slippage(public_client, PAIRS_PERP, OrderSide.SELL.value, AMOUNT_USDC, MAX_SLIPPAGE_PERCENTAGE),
+        )
 
         status = BUY_MARKET(client=client, pairs=PAIRS_SPOT, amount=AMOUNT_USDC)
         print(status)
 
         print("----------------------\n")
-        sleep(0.1)
+        transport.sleep(0.1)
 
         ## TRADE PERP
         status = SHORT_PERP(client=client, pairs=PAIRS_PERP, amount=AMOUNT_USDC)
@@ -77,4 +121,8 @@ if __name__ == "__main__":
 
     except Exception as e:
         print(f"Error: {e}")
-        input("Press Enter to exit...")
\ No newline at end of file
+        input("Press Enter to exit...")
+    finally:
+        # Finishes a BACKPACK_RECORD file even when the run dies.
+        if transport:
+            transport.close()
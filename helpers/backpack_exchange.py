@@ -4,6 +4,8 @@ import requests
 import json
 from cryptography.hazmat.primitives.asymmetric import ed25519
 
+from helpers.fast_json import decode_response
+from helpers.transport import HttpTransport
 from helpers.format_types import (
     CancelOrderType,
     FillType,
@@ -18,17 +20,19 @@ from helpers.format_types import (
 class BackpackExchange:
     BASE_URL = "https://api.backpack.exchange/"
 
-    def __init__(self, api_key: str, private_key: str):
+    def __init__(self, api_key: str, private_key: str, transport=None):
         """
         Initialize the BackpackExchange client.
 
         :param api_key: Your API key (Base64 encoded verifying key of the ED25519 keypair).
         :param private_key: Your private key for signing requests.
+        :param transport: HTTP transport (see helpers.transport), live HTTP by default.
         """
         self.api_key = api_key
         self.private_key = ed25519.Ed25519PrivateKey.from_private_bytes(base64.b64decode(private_key))
-        self.session = requests.session()
+        self.transport = transport or HttpTransport()
         self.window = 5000
+        self.risk_engine = None  # Optional helpers.risk.RiskEngine checked before every order
 
 
     def _send_request(self, method, endpoint, action, params=None):
@@ -41,26 +45,20 @@ class BackpackExchange:
 
         try:
             if method == "GET":
-                response = self.session.get(url, headers=headers, params=params)
-            elif method == "DELETE":
-                response = self.session.delete(url, headers=headers, data=json.dumps(params))
-            elif method == "PATCH":
-                response = self.session.patch(url, headers=headers, data=json.dumps(params))
-            elif method == "PUT":
-                response = self.session.put(url, headers=headers, data=json.dumps(params))
+                response = self.transport.request(method, url, headers=headers, params=params)
             else:
-                response = self.session.post(url, headers=headers, data=json.dumps(params))
+                response = self.transport.request(method, url, headers=headers, data=json.dumps(params))
 
             if 200 <= response.status_code < 300:
                 if response.status_code == 204:
                     return None
                 try:
-                    return response.json()
+                    return decode_response(response)
                 except ValueError:
                     return response.text
             else:
                 try:
-                    error = response.json()
+                    error = decode_response(response)
                     raise Exception(f"API Error: {error.get('code')} - {error.get('message')}")
                 except ValueError:
                     raise Exception(f"HTTP Error {response.status_code}: {response.text}")
@@ -127,6 +125,13 @@ class BackpackExchange:
         """
         return self._send_request("GET", "api/v1/capital", "balanceQuery")
 
+    def get_collateral(self, subaccountId: int = None):
+        """
+        Get collateral information: net equity, margin fractions and per-asset collateral.
+        """
+        params = {"subaccountId": subaccountId} if subaccountId else {}
+        return self._send_request("GET", "api/v1/capital/collateral", "collateralQuery", params)
+
     def get_open_orders(self, symbol: str = None):
         """
         Get all open orders.
@@ -136,6 +141,30 @@ class BackpackExchange:
         params = {"symbol": symbol} if symbol else {}
         return self._send_request("GET", "api/v1/orders", "orderQueryAll", params=params)
 
+    def get_open_order(self, symbol: str, clientId: int = None, orderId: str = None):
+        """
+        Retrieves an open order from the order book. Filled or cancelled orders are not returned.
+
+        One of orderId or clientId must be specified.
+        """
+        params = {"symbol": symbol}
+        if clientId:
+            params["clientId"] = clientId
+        if orderId:
+            params["orderId"] = orderId
+        return self._send_request("GET", "api/v1/order", "orderQuery", params)
+
+    def get_fill_history(self, symbol: str = None, orderId: str = None, limit: int = 100, offset: int = 0):
+        """
+        Retrieves historical fills, optionally filtered by symbol or order id.
+        """
+        params = {"limit": limit, "offset": offset}
+        if symbol:
+            params["symbol"] = symbol
+        if orderId:
+            params["orderId"] = orderId
+        return self._send_request("GET", "wapi/v1/history/fills", "fillHistoryQueryAll", params)
+
     def cancel_open_order(self, symbol: str, clientId: int = None, orderId: str = None):
         """
         Cancels an open order from the order book.
@@ -147,7 +176,10 @@ class BackpackExchange:
             data["clientId"] = clientId
         if orderId:
             data["orderId"] = orderId
-        return self._send_request("DELETE", "api/v1/order", "orderCancel", data)
+        result = self._send_request("DELETE", "api/v1/order", "orderCancel", data)
+        if self.risk_engine and result:
+            self.risk_engine.on_cancel(result.get("id", orderId))
+        return result
     
     def get_markets(self):
         """
@@ -171,7 +203,18 @@ class BackpackExchange:
             params["subaccountId"] = subaccountId
         if symbol:
             params["symbol"] = symbol
-        return self._send_request("GET", "/wapi/v1/history/pnl", "pnlHistoryQueryAll", params)
+        return self._send_request("GET", "wapi/v1/history/pnl", "pnlHistoryQueryAll", params)
+
+    def get_funding_payments(self, subaccountId: int = None, symbol: str = None, limit: int = 100, offset: int = 0):
+        """
+        Users funding payment history for futures.
+        """
+        params = {"limit": limit, "offset": offset}
+        if subaccountId:
+            params["subaccountId"] = subaccountId
+        if symbol:
+            params["symbol"] = symbol
+        return self._send_request("GET", "wapi/v1/history/funding", "fundingHistoryQueryAll", params)
 
     def get_max_order_quantity(
         self,
@@ -318,7 +361,15 @@ class BackpackExchange:
         if triggerQuantity:
             data["triggerQuantity"] = triggerQuantity
 
-        return self._send_request("POST", "api/v1/order", "orderExecute", data)
+        if self.risk_engine:
+            self.risk_engine.check_order(
+                symbol, data["side"], quantity=quantity, price=price, quoteQuantity=quoteQuantity, reduceOnly=reduceOnly
+            )
+
+        result = self._send_request("POST", "api/v1/order", "orderExecute", data)
+        if self.risk_engine:
+            self.risk_engine.on_order(result)
+        return result
 
 
 
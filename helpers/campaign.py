@@ -0,0 +1,303 @@
+import logging
+import random
+from datetime import datetime, timezone
+
+from helpers.risk import RiskEngine, RiskLimits
+
+# Prior cost per dollar of volume before any fill is seen: maker entry plus taker exit, roughly.
+DEFAULT_COST_RATE = 0.0005
+
+
+class CampaignLedger:
+    """
+    Running volume, fees, funding and realized PnL of a campaign, per (account, symbol), built from fills.
+
+    Fills and funding payments are de-duplicated by id, so the same history page can be ingested
+    repeatedly. Entries timestamped before `since` (an ISO string in the API's UTC format) are ignored,
+    so a ledger started mid-history only counts its own trades. Positions and realized PnL come from
+    one `RiskEngine` per account.
+    """
+
+    def __init__(self, since: str = None):
+        self.since = since
+        self.engines = {}  # account -> RiskEngine used as a position / PnL book
+        self.volume = {}  # (account, symbol) -> quote volume
+        self.fees = {}
+        self.funding = {}
+        self.seen = set()
+
+    def _engine(self, account: str) -> RiskEngine:
+        engine = self.engines.get(account)
+        if engine is None:
+            engine = self.engines[account] = RiskEngine(RiskLimits())
+        return engine
+
+    def on_fill(self, account: str, symbol: str, side: str, quantity: float, price: float, fee: float = 0.0):
+        key = (account, symbol)
+        quantity, price, fee = float(quantity), float(price), float(fee)
+        self.volume[key] = self.volume.get(key, 0.0) + quantity * price
+        self.fees[key] = self.fees.get(key, 0.0) + fee
+        # Fees are tracked here, so the engine only books the trading PnL.
+        self._engine(account).on_fill(symbol, side, quantity, price)
+
+    def on_funding(self, account: str, symbol: str, payment: float):
+        """
+        Record a funding payment; positive is received, negative paid.
+        """
+        key = (account, symbol)
+        self.funding[key] = self.funding.get(key, 0.0) + float(payment)
+
+    def ingest_fills(self, fills: list, account: str = "default") -> int:
+        """
+        Add `get_fill_history` entries not seen before, oldest first (pages come newest first, and
+        average-cost PnL depends on the order). Fees charged in another asset than the quote are skipped.
+        """
+        added = 0
+        for fill in sorted(fills or [], key=lambda f: f.get("timestamp") or ""):
+            fill_id = ("fill", account, fill.get("tradeId") or fill.get("id"), fill.get("orderId"), fill.get("timestamp"))
+            if fill_id in self.seen or (self.since and (fill.get("timestamp") or "") < self.since):
+                continue
+            self.seen.add(fill_id)
+            quote = fill["symbol"].split("_")[1]
+            fee = float(fill.get("fee") or 0) if fill.get("feeSymbol", quote) == quote else 0.0
+            self.on_fill(account, fill["symbol"], fill["side"], fill["quantity"], fill["price"], fee)
+            added += 1
+        return added
+
+    def ingest_funding(self, payments: list, account: str = "default") -> int:
+        """
+        Add `get_funding_payments` entries not seen before.
+        """
+        added = 0
+        for payment in payments or []:
+            payment_id = ("funding", account, payment["symbol"], payment.get("intervalEndTimestamp"))
+            if payment_id in self.seen or (self.since and (payment.get("intervalEndTimestamp") or "") < self.since):
+                continue
+            self.seen.add(payment_id)
+            self.on_funding(account, payment["symbol"], payment["quantity"])
+            added += 1
+        return added
+
+    def realized_pnl(self, account: str = None) -> float:
+        engines = [self.engines[account]] if account else self.engines.values()
+        return sum(engine.realized_pnl for engine in engines)
+
+    def net_pnl(self, symbol: str, account: str = "default") -> float:
+        """
+        Realized PnL of one symbol after fees and funding.
+        """
+        key = (account, symbol)
+        state = self._engine(account).symbols.get(symbol)
+        realized = state.realized_pnl if state else 0.0
+        return realized - self.fees.get(key, 0.0) + self.funding.get(key, 0.0)
+
+    def summary(self, account: str = None) -> dict:
+        """
+        Totals and the net cost per dollar of volume: (fees - funding - realized PnL) / volume.
+        """
+        keys = [k for k in self.volume if account is None or k[0] == account]
+        volume = sum(self.volume[k] for k in keys)
+        fees = sum(self.fees.get(k, 0.0) for k in keys)
+        funding = sum(v for k, v in self.funding.items() if account is None or k[0] == account)
+        pnl = self.realized_pnl(account)
+        cost = fees - funding - pnl
+        return {
+            "volume": volume,
+            "fees": fees,
+            "funding": funding,
+            "realized_pnl": pnl,
+            "cost": cost,
+            "cost_per_volume": cost / volume if volume else 0.0,
+        }
+
+    def cost_rates(self) -> dict:
+        """
+        Observed cost per dollar of volume for each symbol, across accounts.
+        """
+        totals = {}
+        for (account, symbol), volume in self.volume.items():
+            entry = totals.setdefault(symbol, [0.0, 0.0])
+            entry[0] += volume
+            entry[1] += self.fees.get((account, symbol), 0.0) - self.funding.get((account, symbol), 0.0)
+        for account, engine in self.engines.items():
+            for symbol, state in engine.symbols.items():
+                if symbol in totals:
+                    totals[symbol][1] -= state.realized_pnl
+        return {symbol: cost / volume for symbol, (volume, cost) in totals.items() if volume}
+
+
+class PlannedTrade:
+    __slots__ = ("at", "account", "symbol", "side", "notional")
+
+    def __init__(self, at: float, account: str, symbol: str, side: str, notional: float):
+        """
+        One round trip: open `notional` on `side` at unix time `at`, closed at the account's next trade.
+        """
+        self.at = at
+        self.account = account
+        self.symbol = symbol
+        self.side = side
+        self.notional = notional
+
+    def __repr__(self):
+        return f"PlannedTrade({self.at:.0f}, {self.account}, {self.symbol}, {self.side}, {self.notional:.2f})"
+
+
+class CampaignPlanner:
+    """
+    Plan round trips across pairs and accounts to reach `target_volume` without spending more than `budget`.
+
+    `cost_rates` is the expected cost per dollar of volume for each symbol (fees + spread + expected
+    loss), e.g. maker fee on the entry plus taker fee on the exit. Volume goes to the cheapest symbols
+    first, each capped at `max_share` of the target. Every round trip counts twice towards volume
+    (open and close). Gaps between an account's trades are drawn from [min_sleep, max_sleep] as in start.py.
+    """
+
+    def __init__(
+        self,
+        target_volume: float,
+        budget: float,
+        cost_rates: dict,
+        accounts: list,
+        trade_size: tuple = (100, 200),
+        min_sleep: int = 600,
+        max_sleep: int = 1200,
+        max_share: float = 1.0,
+        side: str = "Ask",
+        seed: int = None,
+    ):
+        self.target_volume = target_volume
+        self.budget = budget
+        self.cost_rates = dict(cost_rates)
+        self.accounts = list(accounts)
+        self.trade_size = trade_size
+        self.min_sleep = min_sleep
+        self.max_sleep = max_sleep
+        self.max_share = max_share
+        self.side = side
+        self.random = random.Random(seed)
+
+    def allocate(self, volume: float, budget: float) -> dict:
+        """
+        Volume per symbol, cheapest first, within `budget`.
+        """
+        allocation = {}
+        for symbol, rate in sorted(self.cost_rates.items(), key=lambda item: item[1]):
+            if volume <= 0:
+                break
+            share = min(volume, self.target_volume * self.max_share)
+            if rate > 0:
+                share = min(share, budget / rate)
+            if share <= 0:
+                continue
+            allocation[symbol] = share
+            volume -= share
+            budget -= share * max(rate, 0.0)
+        return allocation
+
+    def plan(self, start: float, volume: float = None, budget: float = None) -> list:
+        """
+        Schedule round trips from unix time `start`, sorted by time.
+        """
+        volume = self.target_volume if volume is None else volume
+        budget = self.budget if budget is None else budget
+        allocation = self.allocate(volume, budget)
+        if sum(allocation.values()) < volume * 0.999:
+            logging.warning(f"Budget {budget:.2f} only covers {sum(allocation.values()):.0f} of {volume:.0f} volume")
+
+        clocks = {account: start for account in self.accounts}
+        trades = []
+        for symbol, symbol_volume in allocation.items():
+            while symbol_volume > 0:
+                # Whichever account frees up first takes the next trade.
+                account = min(clocks, key=clocks.get)
+                notional = min(self.random.uniform(*self.trade_size), symbol_volume / 2)
+                trades.append(PlannedTrade(clocks[account], account, symbol, self.side, notional))
+                symbol_volume -= 2 * notional
+                clocks[account] += self.random.randint(self.min_sleep, self.max_sleep)
+        trades.sort(key=lambda trade: trade.at)
+        return trades
+
+    def replan(self, ledger: CampaignLedger, now: float, smoothing: float = 0.5) -> list:
+        """
+        Re-plan what is left after the fills in `ledger`: observed cost rates are blended into the
+        expected ones (weight `smoothing`), and the remaining volume and budget are re-allocated.
+        """
+        for symbol, observed in ledger.cost_rates().items():
+            expected = self.cost_rates.get(symbol, observed)
+            self.cost_rates[symbol] = (1 - smoothing) * expected + smoothing * observed
+
+        summary = ledger.summary()
+        remaining_volume = max(self.target_volume - summary["volume"], 0.0)
+        remaining_budget = max(self.budget - summary["cost"], 0.0)
+        return self.plan(now, remaining_volume, remaining_budget)
+
+
+def klines_to_arrays(klines: list) -> tuple:
+    """
+    `(timestamps, close prices)` NumPy arrays from `PublicClient.get_klines` output.
+    """
+    import numpy as np  # only the backtest needs it; start.py imports this module on every launch
+
+    timestamps = np.array([
+        datetime.fromisoformat(k["start"]).replace(tzinfo=timezone.utc).timestamp() for k in klines
+    ])
+    closes = np.array([float(k["close"]) for k in klines])
+    return timestamps, closes
+
+
+def simulate(trades: list, prices: dict, maker_fee: float, taker_fee: float, funding_rate: dict = None) -> dict:
+    """
+    Replay a plan against historical prices. Vectorized per symbol, so large plans run in milliseconds.
+
+    `prices` maps symbol -> `(timestamps, closes)` (see `klines_to_arrays`). Each round trip opens as a
+    maker at the close at its start time and exits as a taker at the close when the account's next
+    trade starts (the account's last trade exits one kline later). `funding_rate` optionally maps
+    symbol -> hourly funding rate paid by longs.
+
+    Returns the totals from `CampaignLedger.summary` plus per-symbol breakdowns.
+    """
+    import numpy as np
+
+    funding_rate = funding_rate or {}
+    next_start = {}
+    by_account = {}
+    for trade in sorted(trades, key=lambda t: t.at):
+        by_account.setdefault(trade.account, []).append(trade)
+    for account_trades in by_account.values():
+        for current, following in zip(account_trades, account_trades[1:] + [None]):
+            next_start[id(current)] = following.at if following else None
+
+    per_symbol = {}
+    for symbol in {t.symbol for t in trades}:
+        symbol_trades = [t for t in trades if t.symbol == symbol]
+        timestamps, closes = prices[symbol]
+        opens_at = np.array([t.at for t in symbol_trades])
+        default_exit = opens_at + (timestamps[1] - timestamps[0] if len(timestamps) > 1 else 60)
+        closes_at = np.array([next_start[id(t)] or 0.0 for t in symbol_trades])
+        closes_at = np.where(closes_at > 0, closes_at, default_exit)
+        notional = np.array([t.notional for t in symbol_trades])
+        direction = np.array([1.0 if t.side == "Bid" else -1.0 for t in symbol_trades])
+
+        last = len(closes) - 1
+        entry = closes[np.clip(np.searchsorted(timestamps, opens_at, side="right") - 1, 0, last)]
+        exit_price = closes[np.clip(np.searchsorted(timestamps, closes_at, side="right") - 1, 0, last)]
+        quantity = notional / entry
+
+        pnl = direction * quantity * (exit_price - entry)
+        fees = notional * maker_fee + quantity * exit_price * taker_fee
+        hours = (closes_at - opens_at) / 3600
+        funding = -direction * notional * funding_rate.get(symbol, 0.0) * hours
+
+        per_symbol[symbol] = {
+            "volume": float((notional + quantity * exit_price).sum()),
+            "fees": float(fees.sum()),
+            "funding": float(funding.sum()),
+            "realized_pnl": float(pnl.sum()),
+        }
+
+    totals = {key: sum(s[key] for s in per_symbol.values()) for key in ("volume", "fees", "funding", "realized_pnl")}
+    totals["cost"] = totals["fees"] - totals["funding"] - totals["realized_pnl"]
+    totals["cost_per_volume"] = totals["cost"] / totals["volume"] if totals["volume"] else 0.0
+    totals["per_symbol"] = per_symbol
+    return totals
@@ -0,0 +1,370 @@
+import logging
+import math
+from time import sleep, time
+
+from helpers.format_types import OrderSide, OrderType, TimeInForce
+from helpers.order_book import OrderBook
+
+
+def round_down(value: float, step_size) -> str:
+    """
+    Round `value` down to a multiple of a tick or step size, as a string for `execute_order`.
+    """
+    step_size = str(step_size)
+    decimal_places = step_size[::-1].find('.') if '.' in step_size else 0
+    step = float(step_size)
+    return f"{int(value / step + 1e-9) * step:.{decimal_places}f}"
+
+
+def round_up(value: float, step_size) -> str:
+    """
+    Round `value` up to a multiple of a tick or step size, as a string for `execute_order`.
+    """
+    step_size = str(step_size)
+    decimal_places = step_size[::-1].find('.') if '.' in step_size else 0
+    step = float(step_size)
+    return f"{math.ceil(value / step - 1e-9) * step:.{decimal_places}f}"
+
+
+def _not_found(error: Exception) -> bool:
+    # The API answers 404 RESOURCE_NOT_FOUND for orders that are no longer open.
+    return "RESOURCE_NOT_FOUND" in str(error) or "HTTP Error 404" in str(error)
+
+
+class ExecutionReport:
+    """
+    Fills of one parent order and its implementation shortfall against the arrival price.
+    """
+
+    def __init__(self, symbol: str, side: str, quantity: float, arrival_price: float):
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.arrival_price = arrival_price
+        self.filled_quantity = 0.0
+        self.filled_notional = 0.0
+        self.fees = 0.0
+        self.children = []  # (timestamp, order id, requested quantity, filled quantity, filled notional)
+
+    def add_fill(self, order_id: str, requested: float, quantity: float, notional: float, fee: float = 0.0, timestamp: float = None):
+        self.filled_quantity += quantity
+        self.filled_notional += notional
+        self.fees += fee
+        self.children.append((time() if timestamp is None else timestamp, order_id, requested, quantity, notional))
+
+    @property
+    def remaining(self) -> float:
+        return max(self.quantity - self.filled_quantity, 0.0)
+
+    @property
+    def average_price(self) -> float:
+        return self.filled_notional / self.filled_quantity if self.filled_quantity else None
+
+    @property
+    def implementation_shortfall(self) -> float:
+        """
+        Cost versus the arrival price as a fraction (0.001 = 10 bps), positive when worse.
+        Fees are included; the unfilled remainder is not charged.
+        """
+        if not self.filled_quantity:
+            return 0.0
+        sign = 1 if self.side == OrderSide.BUY.value else -1
+        slippage = sign * (self.filled_notional - self.arrival_price * self.filled_quantity)
+        return (slippage + self.fees) / (self.arrival_price * self.filled_quantity)
+
+    def __repr__(self):
+        return (
+            f"ExecutionReport({self.symbol} {self.side} {self.filled_quantity}/{self.quantity} "
+            f"@ {self.average_price}, shortfall {self.implementation_shortfall * 1e4:.1f} bps, {len(self.children)} children)"
+        )
+
+
+class ExecutionAlgo:
+    """
+    Base for parent-order execution algorithms on top of `BackpackExchange.execute_order`.
+
+    Subclasses implement `slices`, yielding `(wait_seconds, quantity)` child orders. Each child is sent
+    as an IOC limit capped `max_slippage` away from the best price (or as a market order if no
+    `public_client` is given) and, when `public_client` is given, shrunk to what the visible book can
+    fill within `max_slippage`. Whatever a child leaves unfilled is rolled into later slices.
+
+    Shortfall is measured against `arrival_price`, or the book mid at start when `public_client` is given.
+    `sleep` and `clock` can be swapped together for a simulated exchange's, so a run takes no real time.
+    """
+
+    def __init__(
+        self,
+        client,
+        symbol: str,
+        side,
+        quantity: float,
+        step_size,
+        tick_size,
+        public_client=None,
+        max_slippage: float = 0.002,
+        arrival_price: float = None,
+        sleep=sleep,
+        clock=time,
+    ):
+        self.client = client
+        self.public_client = public_client
+        self.symbol = symbol
+        self.side = side.value if isinstance(side, OrderSide) else side
+        self.quantity = float(quantity)
+        self.step_size = step_size
+        self.tick_size = tick_size
+        self.max_slippage = max_slippage
+        self.arrival_price = arrival_price
+        self.sleep = sleep
+        self.clock = clock
+        self.report = None
+
+    def slices(self):
+        raise NotImplementedError
+
+    def _book(self) -> OrderBook:
+        return OrderBook.from_depth(self.symbol, self.public_client.get_depth(self.symbol), self.tick_size)
+
+    def _arrival_price(self) -> float:
+        if self.arrival_price:
+            return float(self.arrival_price)
+        if not self.public_client:
+            raise ValueError("arrival_price is required without a public_client")
+        return self._book().mid_price
+
+    def send_child(self, quantity: float):
+        """
+        Send one child order for up to `quantity` and record its immediate fill.
+        """
+        order = {"orderType": OrderType.MARKET.value}
+        if self.public_client:
+            book = self._book()
+            buying = self.side == OrderSide.BUY.value
+            best = book.best_ask if buying else book.best_bid
+            if best is None:
+                logging.warning(f"{type(self).__name__}: {self.symbol} book is empty on the taken side, skipping child")
+                return
+            quote_cap = book.max_quote_for_slippage(self.side, self.max_slippage)
+            capped = book.quantity_for_quote(self.side, quote_cap) if quote_cap > 0 else 0.0
+            if capped is None:  # the cap is the whole visible book
+                capped = float(book.cumulative_depth(self.side)[1][-1])
+            quantity = min(quantity, capped)
+            # Round the cap towards the best price so rounding never loosens it.
+            limit = best * (1 + self.max_slippage if buying else 1 - self.max_slippage)
+            order = {
+                "orderType": OrderType.LIMIT.value,
+                "price": round_down(limit, self.tick_size) if buying else round_up(limit, self.tick_size),
+                "timeInForce": TimeInForce.IOC.value,
+            }
+
+        size = round_down(quantity, self.step_size)
+        if float(size) <= 0:
+            return
+        try:
+            order_status = self.client.execute_order(symbol=self.symbol, side=self.side, quantity=size, **order)
+        except Exception as e:
+            logging.error(f"{type(self).__name__} child order failed: {e}")
+            return
+        self.report.add_fill(
+            order_status.get("id"),
+            float(size),
+            float(order_status.get("executedQuantity") or 0),
+            float(order_status.get("executedQuoteQuantity") or 0),
+            timestamp=self.clock(),
+        )
+
+    def run(self) -> ExecutionReport:
+        self.report = ExecutionReport(self.symbol, self.side, self.quantity, self._arrival_price())
+        for wait, quantity in self.slices():
+            if wait > 0:
+                self.sleep(wait)
+            if self.report.remaining <= 0:
+                break
+            self.send_child(min(quantity, self.report.remaining))
+        logging.info(self.report)
+        return self.report
+
+
+class TWAP(ExecutionAlgo):
+    """
+    Equal slices spread evenly over `duration` seconds.
+    """
+
+    def __init__(self, *args, duration: float = 300, num_slices: int = 10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.duration = duration
+        self.num_slices = num_slices
+
+    def slices(self):
+        interval = self.duration / self.num_slices
+        for i in range(self.num_slices):
+            # Spread what is still unfilled over the slices left, so misses are caught up.
+            yield (interval if i else 0), self.report.remaining / (self.num_slices - i)
+
+
+class VWAP(ExecutionAlgo):
+    """
+    Slices proportional to a historical volume profile over `duration` seconds.
+    `profile` is one weight per slice, e.g. from `volume_profile`.
+    """
+
+    def __init__(self, *args, duration: float = 300, profile: list = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.duration = duration
+        self.profile = profile or [1.0] * 10
+
+    def slices(self):
+        interval = self.duration / len(self.profile)
+        for i, weight in enumerate(self.profile):
+            left = sum(self.profile[i:])
+            yield (interval if i else 0), self.report.remaining * weight / left if left else 0.0
+
+
+class POV(ExecutionAlgo):
+    """
+    Trade `participation` of the market volume printed every `interval` seconds, until filled or `duration` ends.
+    Market volume comes from `PublicClient.get_recent_trades`, so `public_client` is required.
+    """
+
+    def __init__(self, *args, participation: float = 0.1, interval: float = 10, duration: float = 600, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.participation = participation
+        self.interval = interval
+        self.duration = duration
+
+    def slices(self):
+        last_trade_id = max((int(t["id"]) for t in self.public_client.get_recent_trades(self.symbol, limit=1)), default=0)
+        for _ in range(int(self.duration / self.interval)):
+            self.sleep(self.interval)
+            trades = self.public_client.get_recent_trades(self.symbol, limit=1000)
+            volume = sum(float(t["quantity"]) for t in trades if int(t["id"]) > last_trade_id)
+            last_trade_id = max((int(t["id"]) for t in trades), default=last_trade_id)
+            yield 0, volume * self.participation
+
+
+class Iceberg(ExecutionAlgo):
+    """
+    Rest one `display_quantity` clip at `limit_price` at a time and post the next clip once it fills.
+
+    A clip's state is polled every `interval` seconds; a clip still resting when `duration` ends is
+    cancelled with `cancel_open_order`. Fills are read from `get_fill_history`, which can lag, so
+    each clip reserves its size (or the executed quantity its cancel reports) until its fills show
+    up, and the next clip is capped by what is not reserved. The parent is never over-filled.
+    """
+
+    def __init__(self, *args, limit_price: float, display_quantity: float, interval: float = 5, duration: float = 600, post_only: bool = True, retries: int = 3, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limit_price = limit_price
+        self.display_quantity = display_quantity
+        self.interval = interval
+        self.duration = duration
+        self.post_only = post_only
+        self.retries = retries
+
+    def _clip_fills(self, order_id: str):
+        fills = self.client.get_fill_history(symbol=self.symbol, orderId=order_id, limit=1000) or []
+        quantity = sum(float(f["quantity"]) for f in fills)
+        notional = sum(float(f["quantity"]) * float(f["price"]) for f in fills)
+        fee = sum(float(f.get("fee") or 0) for f in fills)
+        return quantity, notional, fee
+
+    def _is_open(self, order_id: str):
+        """
+        True while the clip rests, False once the API no longer knows it as open, None if that could not be told.
+        """
+        for attempt in range(self.retries):
+            try:
+                return bool(self.client.get_open_order(symbol=self.symbol, orderId=order_id))
+            except Exception as e:
+                if _not_found(e):
+                    return False
+                logging.warning(f"Iceberg clip {order_id} status check failed ({attempt + 1}/{self.retries}): {e}")
+                self.sleep(min(self.interval, 1))
+        return None
+
+    def _cancel(self, order_id: str) -> float:
+        """
+        Cancel a clip. Returns its executed quantity when the cancel reports it, otherwise None.
+        """
+        try:
+            order = self.client.cancel_open_order(symbol=self.symbol, orderId=order_id)
+            return float(order.get("executedQuantity") or 0) if order else None
+        except Exception as e:
+            if not _not_found(e):
+                logging.error(f"Iceberg clip {order_id} cancel failed: {e}")
+            return None
+
+    def _reconcile(self, clips: dict) -> float:
+        """
+        Record newly visible fills of past clips; returns the quantity they reserve but have not shown yet.
+        """
+        unreported = 0.0
+        for clip_id, clip in list(clips.items()):
+            reserved, size, seen = clip[0], clip[1], clip[2:]
+            try:
+                quantity, notional, fee = self._clip_fills(clip_id)
+            except Exception as e:
+                logging.warning(f"Iceberg fill history for {clip_id} failed: {e}")
+                quantity, notional, fee = seen
+            if quantity > seen[0]:
+                self.report.add_fill(clip_id, size, quantity - seen[0], notional - seen[1], fee - seen[2], self.clock())
+                clip[2:] = [quantity, notional, fee]
+            if clip[2] >= reserved - 1e-12:
+                del clips[clip_id]
+            else:
+                unreported += reserved - clip[2]
+        return unreported
+
+    def run(self) -> ExecutionReport:
+        self.report = ExecutionReport(self.symbol, self.side, self.quantity, float(self.limit_price))
+        deadline = self.clock() + self.duration
+        buying = self.side == OrderSide.BUY.value
+        price = round_down(self.limit_price, self.tick_size) if buying else round_up(self.limit_price, self.tick_size)
+        clips = {}  # clip id -> [reserved quantity, size, seen quantity, seen notional, seen fee]
+
+        while self.report.remaining > 0 and self.clock() < deadline:
+            unreported = self._reconcile(clips)
+            size = round_down(min(self.display_quantity, self.report.remaining - unreported), self.step_size)
+            if float(size) <= 0:
+                if not unreported:
+                    break
+                self.sleep(self.interval)  # wait for past clips' fills to show up
+                continue
+            try:
+                clip = self.client.execute_order(
+                    orderType=OrderType.LIMIT.value, side=self.side, symbol=self.symbol,
+                    price=price, quantity=size, postOnly=self.post_only,
+                )
+            except Exception as e:
+                logging.error(f"Iceberg clip failed: {e}")
+                self.sleep(self.interval)
+                continue
+            clips[clip["id"]] = [float(size), float(size), 0.0, 0.0, 0.0]
+
+            # Unknown status (None) counts as still resting.
+            status = self._is_open(clip["id"])
+            while status is not False and self.clock() < deadline:
+                self.sleep(self.interval)
+                status = self._is_open(clip["id"])
+            if status is not False:
+                executed = self._cancel(clip["id"])
+                if executed is not None:
+                    clips[clip["id"]][0] = executed
+
+        self._reconcile(clips)
+        logging.info(self.report)
+        return self.report
+
+
+def volume_profile(public_client, symbol: str, duration: float, num_slices: int, interval: str = "1m") -> list:
+    """
+    Share of volume in each of `num_slices` buckets over the same `duration` window one day earlier.
+    Falls back to a flat profile when there is no history.
+    """
+    start = int(time()) - 86400
+    klines = public_client.get_klines(symbol, interval, start, start + int(duration)) or []
+    weights = [0.0] * num_slices
+    for i, kline in enumerate(klines):
+        weights[min(i * num_slices // len(klines), num_slices - 1)] += float(kline["volume"])
+    total = sum(weights)
+    return [w / total for w in weights] if total else [1.0 / num_slices] * num_slices
@@ -0,0 +1,25 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # optional dependency, `pip install orjson` for faster decoding
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+
+def loads(data):
+    """
+    Decode JSON bytes or text with orjson when installed, otherwise the standard library.
+    Raises ValueError on invalid JSON with either backend.
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_response(response):
+    """
+    Decode a `requests` response body. Faster than `response.json()`, which sniffs the encoding first.
+    """
+    return loads(response.content)
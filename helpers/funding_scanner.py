@@ -0,0 +1,136 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from time import time
+
+from helpers.public_API import PublicClient
+
+HOURS_PER_YEAR = 24 * 365
+
+
+class FundingScanner:
+    """
+    Rank every spot/perp pair by funding rate and basis.
+
+    Market metadata is cached for `markets_ttl` seconds. Each scan takes mark prices, tickers and
+    open interest for all markets in three concurrent bulk calls, and only re-queries a perp's
+    funding history when a new funding interval has settled since it was last fetched.
+
+    Basis is a one-off gain when it converges, so for ranking it is annualized over
+    `holding_days`, the expected life of a hedge.
+    """
+
+    def __init__(self, public_client: PublicClient, markets_ttl: float = 3600, funding_history: int = 24, max_workers: int = 8, holding_days: float = 7):
+        self.public_client = public_client
+        self.holding_days = holding_days
+        self.markets_ttl = markets_ttl
+        self.funding_history = funding_history
+        self.max_workers = max_workers
+
+        self.pairs = {}  # perp symbol -> spot symbol
+        self.markets_loaded_at = 0.0
+        self.funding = {}  # perp symbol -> {"average_rate", "interval_hours", "next_refresh"}
+
+    def _load_markets(self):
+        markets = self.public_client.get_markets()
+        spots = {
+            (m["baseSymbol"], m["quoteSymbol"]): m["symbol"]
+            for m in markets if m.get("marketType") == "SPOT"
+        }
+        self.pairs = {
+            m["symbol"]: spots.get((m["baseSymbol"], m["quoteSymbol"]))
+            for m in markets if m.get("marketType") == "PERP"
+        }
+        self.markets_loaded_at = time()
+
+    def _fetch_funding(self, symbol: str):
+        rates = self.public_client.get_funding_interval_rates(symbol, limit=self.funding_history)
+        if not rates:
+            return symbol, None
+        values = [float(r["fundingRate"]) for r in rates]
+        # Entries are newest first; the gap between the two latest settlements is the funding interval.
+        ends = sorted((_to_ms(r["intervalEndTimestamp"]) for r in rates), reverse=True)
+        interval_ms = ends[0] - ends[1] if len(ends) > 1 else 3600 * 1000
+        return symbol, {
+            "average_rate": sum(values) / len(values),
+            "interval_hours": interval_ms / 3600 / 1000,
+            "next_refresh": (ends[0] + interval_ms) / 1000,
+        }
+
+    def scan(self, sort_by: str = "score") -> list:
+        """
+        Return one row per perp market, best first, with keys: symbol, spot_symbol, mark_price,
+        spot_price, funding_rate, funding_apr, average_funding_apr, basis, basis_apr, open_interest and score.
+
+        `score` is funding APR plus basis APR (basis annualized over `holding_days`): what a long
+        spot / short perp hedge held that long earns per year.
+        """
+        now = time()
+        if not self.pairs or now - self.markets_loaded_at >= self.markets_ttl:
+            self._load_markets()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            mark_prices = executor.submit(self.public_client.get_mark_price)
+            tickers = executor.submit(self.public_client.get_tickers)
+            open_interest = executor.submit(self.public_client.get_open_interest)
+
+            stale = [s for s in self.pairs if s not in self.funding or self.funding[s]["next_refresh"] <= now]
+            for future in [executor.submit(self._fetch_funding, s) for s in stale]:
+                try:
+                    symbol, funding = future.result()
+                    if funding:
+                        self.funding[symbol] = funding
+                except Exception as e:
+                    logging.warning(f"Funding history fetch failed: {e}")
+
+            marks = {m["symbol"]: m for m in mark_prices.result() or []}
+            last_prices = {t["symbol"]: float(t["lastPrice"]) for t in tickers.result() or []}
+            interest = {o["symbol"]: float(o.get("openInterest") or 0) for o in open_interest.result() or []}
+
+        rows = []
+        for symbol, spot_symbol in self.pairs.items():
+            mark = marks.get(symbol)
+            if not mark:
+                continue
+            mark_price = float(mark["markPrice"])
+            spot_price = last_prices.get(spot_symbol) if spot_symbol else None
+            reference = spot_price or float(mark["indexPrice"])
+            funding = self.funding.get(symbol) or {"average_rate": 0.0, "interval_hours": 1.0}
+            periods_per_year = HOURS_PER_YEAR / funding["interval_hours"]
+            funding_rate = float(mark.get("fundingRate") or 0)
+            basis = (mark_price - reference) / reference if reference else 0.0
+            basis_apr = basis * 365 / self.holding_days
+
+            rows.append({
+                "symbol": symbol,
+                "spot_symbol": spot_symbol,
+                "mark_price": mark_price,
+                "spot_price": spot_price,
+                "funding_rate": funding_rate,
+                "funding_apr": funding_rate * periods_per_year,
+                "average_funding_apr": funding["average_rate"] * periods_per_year,
+                "basis": basis,
+                "basis_apr": basis_apr,
+                "open_interest": interest.get(symbol, 0.0) * mark_price,
+                "score": funding_rate * periods_per_year + basis_apr,
+            })
+
+        rows.sort(key=lambda row: row[sort_by], reverse=True)
+        return rows
+
+    def best_hedge(self, min_open_interest: float = 0.0, sort_by: str = "score") -> dict:
+        """
+        Best pair for a long spot / short perp hedge: a spot market must exist and the
+        perp's open interest (in quote) must be at least `min_open_interest`.
+        """
+        for row in self.scan(sort_by=sort_by):
+            if row["spot_symbol"] and row["open_interest"] >= min_open_interest:
+                return row
+        return None
+
+
+def _to_ms(timestamp) -> float:
+    # fundingRates returns ISO timestamps ("2024-01-01T08:00:00"); accept epoch milliseconds too.
+    if isinstance(timestamp, (int, float)) or str(timestamp).isdigit():
+        return float(timestamp)
+    return datetime.fromisoformat(str(timestamp)).replace(tzinfo=timezone.utc).timestamp() * 1000
@@ -0,0 +1,184 @@
+"""
+Typed, `__slots__`-based views over API responses.
+
+Each model keeps only the fields it declares. Numeric and boolean fields are parsed once, when the
+model is built, so every read is a plain slot lookup. Models also answer `model["apiKey"]` and
+`model.get("apiKey")` so they can stand in for the response dicts existing code indexes into.
+
+What models buy is memory: a list of them retains less than half of what the decoded dicts do,
+which matters for long-lived collections such as kline or trade history. They are not faster.
+Building them costs more than reading a field or two from the dicts with `float()`
+(`python benchmark.py models`), so per-request code paths keep using the dicts.
+"""
+
+
+def _bool(value) -> bool:
+    return value if value.__class__ is bool else value == "true"
+
+
+class _Model:
+    __slots__ = ()
+    _fields = {}  # attribute name -> API key
+
+    @classmethod
+    def from_list(cls, items) -> list:
+        return [cls(item) for item in items or []]
+
+    def __getitem__(self, key: str):
+        return getattr(self, self._attributes[key])
+
+    def get(self, key: str, default=None):
+        name = self._attributes.get(key)
+        if name is None:
+            return default
+        value = getattr(self, name)
+        return default if value is None else value
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, name) for name, key in self._fields.items()}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+
+def _model(name: str, doc: str, text=(), numbers=(), integers=(), flags=()):
+    """
+    Build a model class. Each field is given by its camelCase API key and exposed as a snake_case attribute.
+    """
+    def snake(key):
+        return "".join(f"_{c.lower()}" if c.isupper() else c for c in key)
+
+    parsers = {snake(key): float for key in numbers}
+    parsers.update({snake(key): int for key in integers})
+    parsers.update({snake(key): _bool for key in flags})
+    fields = {snake(key): key for key in (*text, *numbers, *integers, *flags)}
+
+    # Generate a straight-line __init__ (as dataclasses do): one `data.get` per slot, no loop or setattr.
+    lines = ["def __init__(self, data):\n", "    get = data.get\n"]
+    for attribute, key in fields.items():
+        if attribute in parsers:
+            parse = parsers[attribute].__name__
+            lines.append(f"    value = get({key!r})\n    self.{attribute} = None if value is None else {parse}(value)\n")
+        else:
+            lines.append(f"    self.{attribute} = get({key!r})\n")
+    namespace = {"float": float, "int": int, "_bool": _bool}
+    exec("".join(lines), namespace)
+
+    return type(name, (_Model,), {
+        "__slots__": tuple(fields),
+        "__doc__": doc,
+        "__init__": namespace["__init__"],
+        "_fields": fields,
+        "_attributes": {key: attribute for attribute, key in fields.items()},
+    })
+
+
+Order = _model(
+    "Order",
+    "An order from `execute_order` or `get_open_orders`.",
+    text=("id", "symbol", "side", "orderType", "status", "timeInForce", "selfTradePrevention", "triggerQuantity"),
+    numbers=(
+        "price", "quantity", "executedQuantity", "executedQuoteQuantity", "quoteQuantity", "triggerPrice",
+        "stopLossTriggerPrice", "stopLossLimitPrice", "takeProfitTriggerPrice", "takeProfitLimitPrice",
+    ),
+    integers=("clientId", "createdAt"),
+    flags=("postOnly", "reduceOnly"),
+)
+
+Position = _model(
+    "Position",
+    "An open futures position from `get_open_positions`.",
+    text=("symbol", "positionId"),
+    numbers=(
+        "netQuantity", "netExposureQuantity", "netExposureNotional", "entryPrice", "markPrice", "breakEvenPrice",
+        "estLiquidationPrice", "pnlRealized", "pnlUnrealized", "cumulativeFundingPayment",
+        "imf", "mmf",
+    ),
+    integers=("subaccountId",),
+)
+
+Kline = _model(
+    "Kline",
+    "One candle from `PublicClient.get_klines`.",
+    text=("start", "end"),
+    numbers=("open", "high", "low", "close", "volume", "quoteVolume"),
+    integers=("trades",),
+)
+
+Trade = _model(
+    "Trade",
+    "A public trade from `PublicClient.get_recent_trades` or `get_historical_trades`.",
+    numbers=("price", "quantity", "quoteQuantity"),
+    integers=("id", "timestamp"),
+    flags=("isBuyerMaker",),
+)
+
+
+class Market(_model(
+    "Market",
+    "A market from `get_markets` or `get_market`.",
+    text=("symbol", "baseSymbol", "quoteSymbol", "marketType", "orderBookState", "createdAt"),
+    numbers=("tickSize", "stepSize", "minQuantity"),
+)):
+    """
+    A market from `get_markets` or `get_market`, with the tick and step sizes lifted out of its `filters`.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, data: dict):
+        filters = data.get("filters") or {}
+        price, quantity = filters.get("price") or {}, filters.get("quantity") or {}
+        super().__init__(dict(
+            data,
+            tickSize=price.get("tickSize"),
+            stepSize=quantity.get("stepSize"),
+            minQuantity=quantity.get("minQuantity"),
+        ))
+
+
+class Depth:
+    """
+    Order book snapshot from `PublicClient.get_depth`. Levels stay as the raw `[price, quantity]` strings;
+    use `to_order_book` for the NumPy-backed analytics in `helpers.order_book`.
+    """
+
+    __slots__ = ("bids", "asks", "last_update_id", "timestamp")
+
+    def __init__(self, data: dict):
+        self.bids = data.get("bids") or []
+        self.asks = data.get("asks") or []
+        self.last_update_id = data.get("lastUpdateId")
+        self.timestamp = data.get("timestamp")
+
+    def to_order_book(self, symbol: str, tick_size):
+        from helpers.order_book import OrderBook  # keeps NumPy off the import path of plain model users
+
+        book = OrderBook(symbol, tick_size, self.bids, self.asks)
+        book.last_update_id = self.last_update_id
+        return book
+
+
+class Balance(_model(
+    "Balance",
+    "One asset's balance from `get_balances`.",
+    text=("asset",),
+    numbers=("available", "locked", "staked"),
+)):
+    """
+    One asset's balance from `get_balances`.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, balances: dict) -> dict:
+        """
+        `get_balances` returns `{asset: {available, locked, staked}}`; map it to `{asset: Balance}`.
+        """
+        return {asset: cls(dict(values, asset=asset)) for asset, values in (balances or {}).items()}
+
+    @property
+    def total(self) -> float:
+        return self.available + self.locked + self.staked
@@ -0,0 +1,356 @@
+import numpy as np
+
+from helpers.format_types import OrderSide
+
+
+def _side_value(side):
+    return side.value if isinstance(side, OrderSide) else side
+
+
+def _parse_levels(levels, tick_size: float, descending: bool):
+    """
+    Parse `[[price, quantity], ...]` string levels into (ticks, quantities) arrays sorted best first.
+    """
+    if not levels:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    raw = np.asarray(levels, dtype=np.float64).reshape(-1, 2)
+    ticks = np.rint(raw[:, 0] / tick_size).astype(np.int64)
+    quantities = raw[:, 1]
+    order = np.argsort(-ticks if descending else ticks, kind="stable")
+    ticks, quantities = ticks[order], quantities[order]
+    keep = quantities > 0
+    return np.ascontiguousarray(ticks[keep]), np.ascontiguousarray(quantities[keep])
+
+
+class _BookSide:
+    """
+    One side of the book: integer price ticks and quantities, best level first.
+
+    Cumulative quantity/notional arrays are rebuilt lazily and only from the first level touched
+    since the last rebuild, so an update deep in the book does not pay for the top of it.
+    """
+
+    def __init__(self, ticks: np.ndarray, quantities: np.ndarray, tick_size: float, descending: bool):
+        self.ticks = ticks
+        self.quantities = quantities
+        self.tick_size = tick_size
+        self.descending = descending
+        self._cum_quantity = np.empty(0, dtype=np.float64)
+        self._cum_notional = np.empty(0, dtype=np.float64)
+        self._dirty_from = 0
+
+    def __len__(self):
+        return len(self.ticks)
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self.ticks * self.tick_size
+
+    def _index(self, tick: int) -> int:
+        # Keys are kept ascending by negating bid ticks, so one searchsorted serves both sides.
+        keys = -self.ticks if self.descending else self.ticks
+        return int(np.searchsorted(keys, -tick if self.descending else tick))
+
+    def update(self, tick: int, quantity: float):
+        """
+        Set the quantity resting at `tick`. A quantity of zero removes the level.
+        """
+        i = self._index(tick)
+        exists = i < len(self.ticks) and self.ticks[i] == tick
+
+        if quantity <= 0:
+            if not exists:
+                return
+            self.ticks = np.delete(self.ticks, i)
+            self.quantities = np.delete(self.quantities, i)
+        elif exists:
+            self.quantities[i] = quantity
+        else:
+            self.ticks = np.insert(self.ticks, i, tick)
+            self.quantities = np.insert(self.quantities, i, quantity)
+
+        self._dirty_from = min(self._dirty_from, i)
+
+    def _refresh(self):
+        n = len(self.ticks)
+        start = self._dirty_from
+        if start >= n and len(self._cum_quantity) == n:
+            return
+
+        if len(self._cum_quantity) != n:
+            cum_quantity = np.empty(n, dtype=np.float64)
+            cum_notional = np.empty(n, dtype=np.float64)
+            cum_quantity[:start] = self._cum_quantity[:start]
+            cum_notional[:start] = self._cum_notional[:start]
+        else:
+            cum_quantity, cum_notional = self._cum_quantity, self._cum_notional
+
+        if start < n:
+            base_quantity = cum_quantity[start - 1] if start else 0.0
+            base_notional = cum_notional[start - 1] if start else 0.0
+            quantities = self.quantities[start:]
+            np.cumsum(quantities, out=cum_quantity[start:])
+            cum_quantity[start:] += base_quantity
+            np.cumsum(quantities * self.prices[start:], out=cum_notional[start:])
+            cum_notional[start:] += base_notional
+
+        self._cum_quantity, self._cum_notional = cum_quantity, cum_notional
+        self._dirty_from = n
+
+    def invalidate(self):
+        self._dirty_from = 0
+
+    @property
+    def cum_quantity(self) -> np.ndarray:
+        self._refresh()
+        return self._cum_quantity
+
+    @property
+    def cum_notional(self) -> np.ndarray:
+        self._refresh()
+        return self._cum_notional
+
+
+class OrderBook:
+    """
+    Order book for one market, kept as contiguous NumPy arrays of integer price ticks and float quantities.
+
+    Build it once from `PublicClient.get_depth` with `from_depth`, then keep it current with `apply_update`.
+    Quantities are in the base asset, notionals in the quote asset.
+    """
+
+    def __init__(self, symbol: str, tick_size, bids=None, asks=None):
+        self.symbol = symbol
+        self.tick_size = float(tick_size)
+        self.last_update_id = None
+        self.load(bids or [], asks or [])
+
+    @classmethod
+    def from_depth(cls, symbol: str, depth: dict, tick_size) -> "OrderBook":
+        """
+        Build a book from a `PublicClient.get_depth` response.
+        """
+        book = cls(symbol, tick_size, depth.get("bids"), depth.get("asks"))
+        book.last_update_id = depth.get("lastUpdateId")
+        return book
+
+    def load(self, bids, asks):
+        """
+        Replace the whole book with the given `[[price, quantity], ...]` levels.
+        """
+        self.bids = _BookSide(*_parse_levels(bids, self.tick_size, descending=True), self.tick_size, True)
+        self.asks = _BookSide(*_parse_levels(asks, self.tick_size, descending=False), self.tick_size, False)
+
+    def apply_update(self, bids=None, asks=None, last_update_id=None):
+        """
+        Apply incremental `[[price, quantity], ...]` level changes. A quantity of "0" removes the level.
+        """
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            for price, quantity in levels or ():
+                side.update(int(round(float(price) / self.tick_size)), float(quantity))
+        if last_update_id is not None:
+            self.last_update_id = last_update_id
+
+    def _taking(self, side) -> _BookSide:
+        # A buy (Bid) takes liquidity from the asks and a sell (Ask) from the bids.
+        return self.asks if _side_value(side) == OrderSide.BUY.value else self.bids
+
+    # ================================================================
+    # Top of book
+    # ================================================================
+    @property
+    def best_bid(self) -> float:
+        return self.bids.ticks[0] * self.tick_size if len(self.bids) else None
+
+    @property
+    def best_ask(self) -> float:
+        return self.asks.ticks[0] * self.tick_size if len(self.asks) else None
+
+    @property
+    def mid_price(self) -> float:
+        if not len(self.bids) or not len(self.asks):
+            return None
+        return (self.bids.ticks[0] + self.asks.ticks[0]) * self.tick_size / 2
+
+    @property
+    def spread(self) -> float:
+        if not len(self.bids) or not len(self.asks):
+            return None
+        return (self.asks.ticks[0] - self.bids.ticks[0]) * self.tick_size
+
+    def microprice(self) -> float:
+        """
+        Top-of-book price weighted towards the side with less resting quantity.
+        """
+        if not len(self.bids) or not len(self.asks):
+            return None
+        bid_quantity, ask_quantity = self.bids.quantities[0], self.asks.quantities[0]
+        total = bid_quantity + ask_quantity
+        return (self.best_bid * ask_quantity + self.best_ask * bid_quantity) / total
+
+    def imbalance(self, levels: int = 1) -> float:
+        """
+        (bid quantity - ask quantity) / total quantity over the top `levels` levels, in [-1, 1].
+        """
+        bid_quantity = self.bids.quantities[:levels].sum()
+        ask_quantity = self.asks.quantities[:levels].sum()
+        total = bid_quantity + ask_quantity
+        return float((bid_quantity - ask_quantity) / total) if total else 0.0
+
+    # ================================================================
+    # Depth and cost to trade
+    # ================================================================
+    def cumulative_depth(self, side) -> tuple:
+        """
+        Prices and cumulative base quantity available to an order on `side`, best level first.
+        """
+        book_side = self._taking(side)
+        return book_side.prices, book_side.cum_quantity
+
+    def vwap_to_fill(self, side, quantity: float) -> float:
+        """
+        Average price paid (Bid) or received (Ask) to fill `quantity` of the base asset against the book.
+        Returns None when the book is too thin to fill it.
+        """
+        book_side = self._taking(side)
+        if quantity <= 0 or not len(book_side):
+            return None
+        cum_quantity, cum_notional = book_side.cum_quantity, book_side.cum_notional
+        i = int(np.searchsorted(cum_quantity, quantity))
+        if i >= len(cum_quantity):
+            return None
+        filled_quantity = cum_quantity[i - 1] if i else 0.0
+        filled_notional = cum_notional[i - 1] if i else 0.0
+        price = book_side.ticks[i] * self.tick_size
+        return float((filled_notional + (quantity - filled_quantity) * price) / quantity)
+
+    def slippage(self, side, quantity: float) -> float:
+        """
+        Fractional cost of filling `quantity` versus the best price on the taken side (0.001 = 0.1%).
+        Returns None when the book is too thin to fill it.
+        """
+        vwap = self.vwap_to_fill(side, quantity)
+        if vwap is None:
+            return None
+        best = self._taking(side).ticks[0] * self.tick_size
+        return abs(vwap - best) / best
+
+    def quantity_for_quote(self, side, quote_quantity: float) -> float:
+        """
+        Base quantity a market order with `quoteQuantity` would fill. Returns None when the book is too thin.
+        """
+        book_side = self._taking(side)
+        if quote_quantity <= 0 or not len(book_side):
+            return None
+        cum_quantity, cum_notional = book_side.cum_quantity, book_side.cum_notional
+        i = int(np.searchsorted(cum_notional, quote_quantity))
+        if i >= len(cum_notional):
+            return None
+        filled_quantity = cum_quantity[i - 1] if i else 0.0
+        filled_notional = cum_notional[i - 1] if i else 0.0
+        price = book_side.ticks[i] * self.tick_size
+        return float(filled_quantity + (quote_quantity - filled_notional) / price)
+
+    def max_quote_for_slippage(self, side, max_slippage: float) -> float:
+        """
+        Largest quote amount a market order on `side` can spend (Bid) or receive (Ask)
+        while keeping its average price within `max_slippage` of the best price.
+        """
+        book_side = self._taking(side)
+        if not len(book_side):
+            return 0.0
+        cum_quantity, cum_notional = book_side.cum_quantity, book_side.cum_notional
+        prices = book_side.prices
+        buying = not book_side.descending
+        limit = prices[0] * (1 + max_slippage if buying else 1 - max_slippage)
+
+        vwaps = cum_notional / cum_quantity
+        within = vwaps <= limit if buying else vwaps >= limit
+        # VWAP worsens monotonically with size, so the levels that fit form a prefix.
+        n = int(np.argmin(within)) if not within.all() else len(within)
+        if n == len(within):
+            return float(cum_notional[-1])
+
+        filled_quantity = cum_quantity[n - 1] if n else 0.0
+        filled_notional = cum_notional[n - 1] if n else 0.0
+        # Solve (filled_notional + q * price) / (filled_quantity + q) == limit for the partial level.
+        partial = (limit * filled_quantity - filled_notional) / (prices[n] - limit)
+        return float(filled_notional + max(partial, 0.0) * prices[n])
+
+
+# ================================================================
+# Vectorized metrics across many books
+# ================================================================
+def _stack(books, attribute: str, levels: int):
+    """
+    Stack the top `levels` prices and quantities of one side of every book into zero-padded 2D arrays.
+    """
+    prices = np.zeros((len(books), levels), dtype=np.float64)
+    quantities = np.zeros((len(books), levels), dtype=np.float64)
+    for row, book in enumerate(books):
+        side = getattr(book, attribute)
+        n = min(levels, len(side))
+        prices[row, :n] = side.ticks[:n] * book.tick_size
+        quantities[row, :n] = side.quantities[:n]
+    return prices, quantities
+
+
+def book_metrics(books, levels: int = 20) -> dict:
+    """
+    Compute top-of-book metrics for many books at once.
+
+    Returns a dict of 1D arrays aligned with `books`: symbol, best_bid, best_ask, mid_price,
+    spread, microprice, imbalance (over `levels`) and bid/ask depth (quote notional over `levels`).
+    Books with an empty side yield NaN prices.
+    """
+    bid_prices, bid_quantities = _stack(books, "bids", levels)
+    ask_prices, ask_quantities = _stack(books, "asks", levels)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        empty = (bid_quantities[:, 0] == 0) | (ask_quantities[:, 0] == 0)
+        best_bid = np.where(empty, np.nan, bid_prices[:, 0])
+        best_ask = np.where(empty, np.nan, ask_prices[:, 0])
+        top_bid, top_ask = bid_quantities[:, 0], ask_quantities[:, 0]
+        microprice = (best_bid * top_ask + best_ask * top_bid) / (top_bid + top_ask)
+
+        bid_total, ask_total = bid_quantities.sum(axis=1), ask_quantities.sum(axis=1)
+        imbalance = np.nan_to_num((bid_total - ask_total) / (bid_total + ask_total))
+
+    return {
+        "symbol": np.array([book.symbol for book in books]),
+        "best_bid": best_bid,
+        "best_ask": best_ask,
+        "mid_price": (best_bid + best_ask) / 2,
+        "spread": best_ask - best_bid,
+        "microprice": microprice,
+        "imbalance": imbalance,
+        "bid_depth": (bid_prices * bid_quantities).sum(axis=1),
+        "ask_depth": (ask_prices * ask_quantities).sum(axis=1),
+    }
+
+
+def batch_vwap_to_fill(books, side, quantities, levels: int = 100) -> np.ndarray:
+    """
+    VWAP to fill `quantities[i]` of the base asset on `books[i]`, looking at most `levels` deep.
+    Entries are NaN where the visible book is too thin.
+    """
+    attribute = "asks" if _side_value(side) == OrderSide.BUY.value else "bids"
+    prices, level_quantities = _stack(books, attribute, levels)
+    quantities = np.asarray(quantities, dtype=np.float64)
+
+    cum_quantity = np.cumsum(level_quantities, axis=1)
+    cum_notional = np.cumsum(prices * level_quantities, axis=1)
+    index = (cum_quantity < quantities[:, None]).sum(axis=1)
+    fillable = index < levels
+    index = np.minimum(index, levels - 1)
+
+    rows = np.arange(len(books))
+    previous = np.maximum(index - 1, 0)
+    filled_quantity = np.where(index > 0, cum_quantity[rows, previous], 0.0)
+    filled_notional = np.where(index > 0, cum_notional[rows, previous], 0.0)
+    notional = filled_notional + (quantities - filled_quantity) * prices[rows, index]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vwap = notional / quantities
+    return np.where(fillable & (quantities > 0) & (level_quantities[rows, index] > 0), vwap, np.nan)
@@ -2,32 +2,36 @@ import logging
 from helpers.format_types import OrderSide, OrderType
 from helpers.backpack_exchange import BackpackExchange
 
-def close_all_orders(client: BackpackExchange):
+def close_all_orders(client: BackpackExchange) -> int:
     """
-    Close all open orders for the account.
+    Close all open orders for the account. Returns the number of orders cancelled.
     """
+    cancelled = 0
     try:
         open_orders = client.get_open_orders()
         if not open_orders:
             logging.info("No open order to close.")
-            return
+            return 0
 
         for order in open_orders:
             client.cancel_open_order(symbol=order['symbol'], orderId=order["id"])
+            cancelled += 1
             logging.info(f"Cancelled order: {order['symbol']}, ID: {order['id']}")
     except Exception as e:
         logging.error(f"Error closing orders: {e}")
+    return cancelled
 
 
-def close_all_positions(client: BackpackExchange):
+def close_all_positions(client: BackpackExchange) -> int:
     """
-    Close all open positions for the account.
+    Close all open positions for the account. Returns the number of positions closed.
     """
+    closed = 0
     try:
         positions_status = client.get_open_positions()
         if not positions_status:
             logging.info("No open positions to close.")
-            return
+            return 0
 
         for position in positions_status:
             side = (
@@ -44,7 +48,9 @@ def close_all_positions(client: BackpackExchange):
                 quantity=abs(float(position['netQuantity'])),
                 reduceOnly=True,
             )
+            closed += 1
             logging.info(f"Closed position status: {order_status['status']}")
 
     except Exception as e:
         logging.error(f"Error in close_all_positions: {e}")
+    return closed
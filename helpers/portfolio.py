@@ -0,0 +1,276 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep, time
+
+import numpy as np
+
+from helpers.backpack_exchange import BackpackExchange
+
+
+class RateLimiter:
+    """
+    Token bucket: at most `rate` calls per second on average, bursts of up to `burst`. Thread safe.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            self.tokens -= 1
+        if wait > 0:
+            sleep(wait)
+
+    def try_acquire(self) -> bool:
+        """
+        Take a token if one is available right now, without waiting.
+        """
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+def load_accounts(path: str = "accounts.json") -> list:
+    """
+    Read `[{"name": ..., "api_key": ..., "api_secret": ...}, ...]` from a JSON file.
+    """
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class PortfolioSnapshot:
+    """
+    One point-in-time view of every account as aligned NumPy arrays.
+
+    Row i of every array is `accounts[i]`; column j of `exposure` and `balances` is `assets[j]`.
+    `exposure` is signed futures notional by base asset, `balances` is total spot quantity by asset.
+    """
+
+    FIELDS = ("equity", "available", "margin_usage", "realized_pnl", "unrealized_pnl")
+
+    def __init__(self, accounts: list, assets: list, rows: dict, exposure: np.ndarray, balances: np.ndarray, errors: dict, timestamp: float):
+        self.accounts = accounts
+        self.assets = assets
+        self.timestamp = timestamp
+        self.errors = errors
+        for field in self.FIELDS:
+            setattr(self, field, rows[field])
+        self.exposure = exposure
+        self.balances = balances
+
+    @property
+    def total_equity(self) -> float:
+        return float(np.nansum(self.equity))
+
+    def net_exposure(self) -> dict:
+        """
+        Futures notional by asset summed over every account.
+        """
+        return dict(zip(self.assets, np.nansum(self.exposure, axis=0).tolist()))
+
+    def _aligned(self, previous, name: str, matrix: bool) -> np.ndarray:
+        # `previous`'s field or matrix realigned to this snapshot's rows/columns, NaN where it has no value.
+        shape = (len(self.accounts), len(self.assets)) if matrix else (len(self.accounts),)
+        out = np.full(shape, np.nan)
+        if not previous:
+            return out
+        previous_rows = {account: i for i, account in enumerate(previous.accounts)}
+        rows = [(i, previous_rows[a]) for i, a in enumerate(self.accounts) if a in previous_rows]
+        if not rows:
+            return out
+        new_rows, old_rows = map(list, zip(*rows))
+        if not matrix:
+            out[new_rows] = getattr(previous, name)[old_rows]
+            return out
+        previous_assets = {asset: j for j, asset in enumerate(previous.assets)}
+        cols = [(j, previous_assets[a]) for j, a in enumerate(self.assets) if a in previous_assets]
+        if cols:
+            new_cols, old_cols = map(list, zip(*cols))
+            out[np.ix_(new_rows, new_cols)] = getattr(previous, name)[np.ix_(old_rows, old_cols)]
+        return out
+
+    def diff(self, previous, tolerance: float = 1e-9) -> list:
+        """
+        `(account, field, old, new)` for every value that changed since `previous` (None: everything).
+        Exposure and balance cells are reported as fields "exposure:<asset>" and "balance:<asset>".
+        Accounts that failed in this snapshot are not reported: their values are unknown, not changed.
+        """
+        changes = []
+        responded = np.array([account not in self.errors for account in self.accounts], dtype=bool)
+
+        def changed(old, new):
+            both_nan = np.isnan(old) & np.isnan(new)
+            return ~both_nan & ~(np.abs(new - old) <= tolerance)
+
+        for field in self.FIELDS:
+            old, new = self._aligned(previous, field, matrix=False), getattr(self, field)
+            for i in np.flatnonzero(changed(old, new) & responded):
+                changes.append((self.accounts[i], field, _value(old[i]), _value(new[i])))
+
+        for matrix_name, label in (("exposure", "exposure"), ("balances", "balance")):
+            old, new = self._aligned(previous, matrix_name, matrix=True), getattr(self, matrix_name)
+            # For accounts that responded, a missing cell and a zero cell are the same holding.
+            old, new = np.nan_to_num(old), np.nan_to_num(new)
+            for i, j in zip(*np.nonzero(changed(old, new) & responded[:, None])):
+                changes.append((self.accounts[i], f"{label}:{self.assets[j]}", float(old[i, j]), float(new[i, j])))
+        return changes
+
+    def with_last_known(self, previous):
+        """
+        Copy of this snapshot where failed accounts keep their values from `previous`, as a baseline
+        for the next `diff`, so an account that recovers is not reported as changed from nothing.
+        """
+        failed = np.array([account in self.errors for account in self.accounts], dtype=bool)
+        if not previous or not failed.any():
+            return self
+        # Keep the assets only failed accounts hold, or they would drop out of the baseline.
+        known = set(self.assets)
+        assets = self.assets + [asset for asset in previous.assets if asset not in known]
+        empty = np.full((len(self.accounts), len(assets)), np.nan)
+        baseline = PortfolioSnapshot(self.accounts, assets, {f: np.full(len(self.accounts), np.nan) for f in self.FIELDS}, empty, empty.copy(), {}, self.timestamp)
+        for field in self.FIELDS:
+            setattr(baseline, field, np.where(failed, baseline._aligned(previous, field, matrix=False), baseline._aligned(self, field, matrix=False)))
+        for name in ("exposure", "balances"):
+            setattr(baseline, name, np.where(failed[:, None], baseline._aligned(previous, name, matrix=True), baseline._aligned(self, name, matrix=True)))
+        return baseline
+
+
+def _value(x) -> float:
+    return None if np.isnan(x) else float(x)
+
+
+class PortfolioAggregator:
+    """
+    Snapshot many accounts concurrently and push only what changed.
+
+    Each account gets its own `BackpackExchange` and a `RateLimiter` of `requests_per_second`;
+    `max_workers` accounts are fetched at once. The clients share `transport` when one is given
+    (e.g. a recording or replay transport), otherwise each has its own HTTP session. `on_change` is
+    called with the list from `PortfolioSnapshot.diff` whenever a refresh changes something.
+
+    `realized_pnl` is the total over an account's whole PnL history. The first refresh pages through
+    all of it, `pnl_history` entries per call; later refreshes only page until they reach entries
+    already counted.
+    """
+
+    def __init__(self, accounts: list, requests_per_second: float = 5, max_workers: int = 32, pnl_history: int = 100, on_change=None, transport=None):
+        self.names = [account["name"] for account in accounts]
+        self.clients = {
+            account["name"]: BackpackExchange(account["api_key"], account["api_secret"], transport=transport) for account in accounts
+        }
+        self.limiters = {name: RateLimiter(requests_per_second, burst=4) for name in self.names}
+        self.max_workers = max_workers
+        self.pnl_history = pnl_history
+        self.on_change = on_change
+        self.realized = {}  # name -> (total, newest timestamp counted, entries counted at that timestamp)
+        self.snapshot = None
+        self.baseline = None  # last snapshot with failed accounts' last known values, diffed against
+
+    def _fetch(self, name: str) -> dict:
+        client, limiter = self.clients[name], self.limiters[name]
+
+        def call(method, *args, **kwargs):
+            limiter.acquire()
+            return method(*args, **kwargs)
+
+        result = {
+            "collateral": call(client.get_collateral) or {},
+            "balances": call(client.get_balances) or {},
+            "positions": call(client.get_open_positions) or [],
+        }
+        result["realized_pnl"] = self._realized_pnl(name, call, client)
+        return result
+
+    def _realized_pnl(self, name: str, call, client) -> float:
+        """
+        Add the PnL history entries newer than the last refresh to the account's running total.
+        Pages come newest first; entries are told apart by (timestamp, symbol, pnlRealized).
+        """
+        total, newest, at_newest = self.realized.get(name, (0.0, "", frozenset()))
+        fresh, offset = [], 0
+        while True:
+            page = call(client.get_pnl_history, limit=self.pnl_history, offset=offset) or []
+            fresh += [entry for entry in page if (entry.get("timestamp") or "") >= newest]
+            if len(page) < self.pnl_history or (newest and (page[-1].get("timestamp") or "") < newest):
+                break
+            offset += len(page)
+
+        keys = [(entry.get("timestamp") or "", entry.get("symbol"), entry.get("pnlRealized")) for entry in fresh]
+        new = [(key, entry) for key, entry in zip(keys, fresh) if key[0] > newest or key not in at_newest]
+        total += sum(float(entry.get("pnlRealized") or 0) for _, entry in new)
+        latest = max((key[0] for key in keys), default=newest)
+        counted = {key for key in keys if key[0] == latest}
+        if latest == newest:
+            counted |= at_newest
+        # Only committed once every page is in, so a failed refresh re-reads the same entries next time.
+        self.realized[name] = (total, latest, frozenset(counted))
+        return total
+
+    def refresh(self) -> PortfolioSnapshot:
+        results, errors = {}, {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {name: executor.submit(self._fetch, name) for name in self.names}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    errors[name] = str(e)
+                    logging.warning(f"Portfolio fetch failed for {name}: {e}")
+
+        snapshot = self._build(results, errors)
+        changes = snapshot.diff(self.baseline)
+        self.baseline = snapshot.with_last_known(self.baseline)
+        self.snapshot = snapshot
+        if changes and self.on_change:
+            self.on_change(changes)
+        return snapshot
+
+    def _build(self, results: dict, errors: dict) -> PortfolioSnapshot:
+        assets = sorted({
+            *(asset for r in results.values() for asset in r["balances"]),
+            *(p["symbol"].split("_")[0] for r in results.values() for p in r["positions"]),
+        })
+        column = {asset: j for j, asset in enumerate(assets)}
+        n = len(self.names)
+        rows = {field: np.full(n, np.nan) for field in PortfolioSnapshot.FIELDS}
+        exposure = np.full((n, len(assets)), np.nan)
+        balances = np.full((n, len(assets)), np.nan)
+
+        for i, name in enumerate(self.names):
+            result = results.get(name)
+            if result is None:
+                continue  # failed accounts stay NaN rather than looking flat
+            collateral = result["collateral"]
+            equity = float(collateral.get("netEquity") or 0)
+            available = float(collateral.get("netEquityAvailable") or 0)
+            rows["equity"][i] = equity
+            rows["available"][i] = available
+            rows["margin_usage"][i] = 1 - available / equity if equity else 0.0
+            rows["realized_pnl"][i] = result["realized_pnl"]
+            rows["unrealized_pnl"][i] = sum(float(p.get("pnlUnrealized") or 0) for p in result["positions"])
+
+            exposure[i].fill(0.0)
+            balances[i].fill(0.0)
+            for position in result["positions"]:
+                notional = abs(float(position.get("netExposureNotional") or 0))
+                sign = 1 if float(position["netQuantity"]) >= 0 else -1
+                exposure[i, column[position["symbol"].split("_")[0]]] += sign * notional
+            for asset, balance in result["balances"].items():
+                balances[i, column[asset]] = sum(float(balance.get(key) or 0) for key in ("available", "locked", "staked"))
+
+        return PortfolioSnapshot(list(self.names), assets, rows, exposure, balances, errors, time())
@@ -1,25 +1,26 @@
-import requests
+from helpers.fast_json import decode_response
+from helpers.transport import HttpTransport
 
 
 class PublicClient:
-    def __init__(self):
+    def __init__(self, transport=None):
         self.base_url = "https://api.backpack.exchange/"
-        self.session = requests.session()
+        self.transport = transport or HttpTransport()
 
     def _get(self, endpoint, params=None):
-        response = self.session.get(url=f"{self.base_url}{endpoint}", params=params)
+        response = self.transport.request("GET", f"{self.base_url}{endpoint}", params=params)
 
         if 200 <= response.status_code < 300:
             if response.status_code == 204:
                 return None
             try:
-                response_data = response.json()
+                response_data = decode_response(response)
                 return response_data
             except ValueError:
                 return response.text
         else:
             try:
-                error = response.json()
+                error = decode_response(response)
                 raise Exception(f"API Error: {error.get('code')} - {error.get('message')}")
             except ValueError:
                 raise Exception(f"HTTP Error {response.status_code}: {response.text}")
@@ -61,6 +62,22 @@ class PublicClient:
         """
         return self._get("api/v1/depth", params={"symbol": symbol})
 
+    def get_ticker(self, symbol: str, interval: str = None):
+        """
+        Retrieves summarised statistics for the last 24 hours (or `interval`) for the given market symbol.
+        """
+        params = {"symbol": symbol}
+        if interval:
+            params["interval"] = interval
+        return self._get("api/v1/ticker", params=params)
+
+    def get_tickers(self, interval: str = None):
+        """
+        Retrieves summarised statistics for the last 24 hours (or `interval`) for all market symbols.
+        """
+        params = {"interval": interval} if interval else None
+        return self._get("api/v1/tickers", params=params)
+
     def get_klines(self, symbol: str, interval: str, start_time: int, end_time: int = None):
         """
         Get K-Lines for the given market symbol, providing a startTime and optionally an endTime.
@@ -71,17 +88,21 @@ class PublicClient:
             params["endTime"] = end_time
         return self._get("api/v1/klines", params=params)
 
-    def get_mark_price(self, symbol: str):
+    def get_mark_price(self, symbol: str = None):
         """
         Retrieves mark price, index price and funding rate for the given market symbol.
+        If no symbol is provided, all perp markets are returned.
         """
-        return self._get("api/v1/markPrices", params={"symbol": symbol})
+        params = {"symbol": symbol} if symbol else None
+        return self._get("api/v1/markPrices", params=params)
 
-    def get_open_interest(self, symbol: str):
+    def get_open_interest(self, symbol: str = None):
         """
         Retrieves the current open interest for the given market.
+        If no symbol is provided, all perp markets are returned.
         """
-        return self._get("api/v1/openInterest", params={"symbol": symbol})
+        params = {"symbol": symbol} if symbol else None
+        return self._get("api/v1/openInterest", params=params)
 
     def get_funding_interval_rates(self, symbol: str, limit: int = 100, offset: int = 0):
         """
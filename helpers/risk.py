@@ -0,0 +1,327 @@
+import logging
+from time import time
+
+from helpers.format_types import OrderSide
+
+
+class RiskLimitExceeded(Exception):
+    pass
+
+
+class RiskLimits:
+    def __init__(
+        self,
+        max_order_notional: float = None,
+        max_symbol_exposure: float = None,
+        max_account_exposure: float = None,
+        max_leverage: float = None,
+        max_loss: float = None,
+        max_open_orders: int = None,
+    ):
+        """
+        Pre-trade limits. Any limit left as None is not enforced.
+
+        :param max_order_notional: Largest notional (quote asset) of a single order.
+        :param max_symbol_exposure: Largest |position| + open order notional per symbol.
+        :param max_account_exposure: Largest gross exposure summed over all symbols.
+        :param max_leverage: Largest account exposure / equity. Needs equity from `sync`.
+        :param max_loss: Realized + unrealized loss (positive number) that trips the kill switch.
+        :param max_open_orders: Largest number of resting orders.
+        """
+        self.max_order_notional = max_order_notional
+        self.max_symbol_exposure = max_symbol_exposure
+        self.max_account_exposure = max_account_exposure
+        self.max_leverage = max_leverage
+        self.max_loss = max_loss
+        self.max_open_orders = max_open_orders
+
+
+class _SymbolState:
+    __slots__ = ("position", "entry_price", "mark_price", "open_notional", "exposure", "realized_pnl")
+
+    def __init__(self):
+        self.position = 0.0  # signed base quantity
+        self.entry_price = 0.0
+        self.mark_price = 0.0
+        self.open_notional = 0.0
+        self.exposure = 0.0  # |position| * mark + open_notional
+        self.realized_pnl = 0.0
+
+    @property
+    def unrealized_pnl(self) -> float:
+        return self.position * (self.mark_price - self.entry_price) if self.position else 0.0
+
+
+class RiskEngine:
+    """
+    In-process pre-trade risk gate.
+
+    Exposure, open order notional and PnL are kept per symbol and summed into account totals
+    incrementally, so `check_order` is a handful of dict lookups regardless of how many symbols
+    or orders are tracked. `sync` rebuilds everything from the exchange and refreshes the
+    `get_max_order_quantity` cross-check; call it periodically (see `maybe_sync`).
+    """
+
+    def __init__(self, limits: RiskLimits, sync_interval: float = 60):
+        self.limits = limits
+        self.sync_interval = sync_interval
+        self.last_sync = 0.0
+        self.equity = None
+        self.killed = False
+        self.kill_reason = None
+
+        self.symbols = {}
+        self.open_orders = {}  # order id -> (symbol, notional)
+        self.max_quantity = {}  # (symbol, side) -> max base quantity from the exchange
+        self.account_exposure = 0.0
+        self.realized_pnl = 0.0
+        self.unrealized_pnl = 0.0
+
+    def _symbol(self, symbol: str) -> _SymbolState:
+        state = self.symbols.get(symbol)
+        if state is None:
+            state = self.symbols[symbol] = _SymbolState()
+        return state
+
+    def _refresh_symbol(self, state: _SymbolState, old_unrealized: float):
+        # Fold one symbol's change into the account totals instead of re-summing every symbol.
+        exposure = abs(state.position) * state.mark_price + state.open_notional
+        self.account_exposure += exposure - state.exposure
+        state.exposure = exposure
+        self.unrealized_pnl += state.unrealized_pnl - old_unrealized
+        self._check_loss()
+
+    def _check_loss(self):
+        max_loss = self.limits.max_loss
+        if max_loss is not None and not self.killed and self.realized_pnl + self.unrealized_pnl <= -max_loss:
+            self.kill(f"loss {self.realized_pnl + self.unrealized_pnl:.2f} reached max_loss {max_loss}")
+
+    # ================================================================
+    # Kill switch
+    # ================================================================
+    def kill(self, reason: str):
+        """
+        Reject every order until `reset` is called.
+        """
+        self.killed = True
+        self.kill_reason = reason
+        logging.error(f"Risk kill switch tripped: {reason}")
+
+    def reset(self):
+        self.killed = False
+        self.kill_reason = None
+
+    # ================================================================
+    # Pre-trade check
+    # ================================================================
+    def check_order(
+        self,
+        symbol: str,
+        side: str,
+        quantity: float = None,
+        price: float = None,
+        quoteQuantity: float = None,
+        reduceOnly: bool = False,
+    ):
+        """
+        Raise RiskLimitExceeded if the order would break a limit. Constant time.
+        Returns the order's notional, or None for orders that only reduce a position.
+
+        Market orders without a price are valued at the last known mark price.
+        Reduce-only orders always pass, so positions can be flattened after the kill switch trips.
+        """
+        if reduceOnly:
+            return
+        if self.killed:
+            raise RiskLimitExceeded(f"Kill switch active: {self.kill_reason}")
+
+        side = side.value if isinstance(side, OrderSide) else side
+        limits = self.limits
+        state = self.symbols.get(symbol) or _SymbolState()
+        quantity = float(quantity) if quantity else None
+        reference_price = float(price) if price else state.mark_price
+
+        if quoteQuantity:
+            notional = float(quoteQuantity)
+            if quantity is None and reference_price:
+                quantity = notional / reference_price
+        elif quantity is not None and reference_price:
+            notional = quantity * reference_price
+        else:
+            raise RiskLimitExceeded(f"Cannot value order on {symbol}: no price and no mark price")
+
+        signed = (quantity or 0.0) if side == OrderSide.BUY.value else -(quantity or 0.0)
+        reduces = state.position and signed and abs(state.position + signed) < abs(state.position)
+        if reduces:
+            return
+
+        if limits.max_order_notional is not None and notional > limits.max_order_notional:
+            raise RiskLimitExceeded(f"{symbol}: order notional {notional:.2f} > {limits.max_order_notional}")
+
+        if limits.max_symbol_exposure is not None and state.exposure + notional > limits.max_symbol_exposure:
+            raise RiskLimitExceeded(
+                f"{symbol}: exposure {state.exposure + notional:.2f} > {limits.max_symbol_exposure}"
+            )
+
+        account_exposure = self.account_exposure + notional
+        if limits.max_account_exposure is not None and account_exposure > limits.max_account_exposure:
+            raise RiskLimitExceeded(f"Account exposure {account_exposure:.2f} > {limits.max_account_exposure}")
+
+        if limits.max_leverage is not None and self.equity:
+            leverage = account_exposure / self.equity
+            if leverage > limits.max_leverage:
+                raise RiskLimitExceeded(f"Leverage {leverage:.2f}x > {limits.max_leverage}x")
+
+        if limits.max_open_orders is not None and len(self.open_orders) >= limits.max_open_orders:
+            raise RiskLimitExceeded(f"{len(self.open_orders)} open orders >= {limits.max_open_orders}")
+
+        max_quantity = self.max_quantity.get((symbol, side))
+        if max_quantity is not None and quantity is not None and quantity > max_quantity:
+            raise RiskLimitExceeded(f"{symbol}: quantity {quantity} > exchange max {max_quantity}")
+        return notional
+
+    # ================================================================
+    # State updates
+    # ================================================================
+    def update_mark(self, symbol: str, mark_price: float):
+        state = self._symbol(symbol)
+        old_unrealized = state.unrealized_pnl
+        state.mark_price = float(mark_price)
+        self._refresh_symbol(state, old_unrealized)
+
+    def on_fill(self, symbol: str, side: str, quantity: float, price: float, fee: float = 0.0):
+        """
+        Apply a fill to the symbol's position, average entry price and realized PnL.
+        """
+        side = side.value if isinstance(side, OrderSide) else side
+        state = self._symbol(symbol)
+        old_unrealized = state.unrealized_pnl
+        quantity, price = float(quantity), float(price)
+        signed = quantity if side == OrderSide.BUY.value else -quantity
+        position = state.position
+
+        if position == 0 or (position > 0) == (signed > 0):
+            state.entry_price = (state.entry_price * abs(position) + price * quantity) / (abs(position) + quantity)
+        else:
+            closed = min(abs(signed), abs(position))
+            pnl = closed * (price - state.entry_price) * (1 if position > 0 else -1)
+            state.realized_pnl += pnl
+            self.realized_pnl += pnl
+            if abs(signed) > abs(position):
+                state.entry_price = price
+
+        state.position = position + signed
+        if abs(state.position) < 1e-12:
+            state.position = 0.0
+            state.entry_price = 0.0
+        if not state.mark_price:
+            state.mark_price = price
+
+        state.realized_pnl -= float(fee)
+        self.realized_pnl -= float(fee)
+        self._refresh_symbol(state, old_unrealized)
+
+    def set_realized_pnl(self, symbol: str, realized_pnl: float):
+        """
+        Replace a symbol's realized PnL with an authoritative figure, such as one built from the
+        exchange's fill history. Resting entries and stop-loss / take-profit exits fill on the exchange
+        after `execute_order` returns, so `on_fill`/`on_order` alone never see them.
+        """
+        state = self._symbol(symbol)
+        self.realized_pnl += float(realized_pnl) - state.realized_pnl
+        state.realized_pnl = float(realized_pnl)
+        self._check_loss()
+
+    def on_order(self, order: dict):
+        """
+        Record an `execute_order` response: its immediate fill and any quantity left resting.
+        """
+        if not order:
+            return
+        symbol, side = order["symbol"], order["side"]
+        executed = float(order.get("executedQuantity") or 0)
+        if executed:
+            executed_quote = float(order.get("executedQuoteQuantity") or 0)
+            price = executed_quote / executed if executed_quote else order.get("price")
+            if price:
+                self.on_fill(symbol, side, executed, price)
+
+        if order.get("status") in ("New", "PartiallyFilled") and order.get("price"):
+            remaining = float(order.get("quantity") or 0) - executed
+            if remaining > 0:
+                self._add_open_order(order["id"], symbol, remaining * float(order["price"]))
+
+    def on_cancel(self, orderId: str):
+        entry = self.open_orders.pop(orderId, None)
+        if entry is None:
+            return
+        symbol, notional = entry
+        state = self._symbol(symbol)
+        state.open_notional -= notional
+        self._refresh_symbol(state, state.unrealized_pnl)
+
+    def reserve(self, reservationId, symbol: str, notional: float):
+        """
+        Count an approved order that has not been acknowledged yet as open notional, so orders
+        approved meanwhile see it. Release it with `on_cancel(reservationId)`.
+        """
+        self._add_open_order(reservationId, symbol, notional)
+
+    def _add_open_order(self, orderId: str, symbol: str, notional: float):
+        self.on_cancel(orderId)
+        self.open_orders[orderId] = (symbol, notional)
+        state = self._symbol(symbol)
+        state.open_notional += notional
+        self._refresh_symbol(state, state.unrealized_pnl)
+
+    # ================================================================
+    # Reconciliation with the exchange
+    # ================================================================
+    def sync(self, client, symbols=None):
+        """
+        Rebuild positions, open orders and equity from the exchange and refresh the
+        `get_max_order_quantity` cross-check for `symbols` (default: every tracked symbol).
+        Realized PnL is kept for every symbol, flat ones included, since the exchange does not
+        return it in these queries.
+        """
+        realized = {symbol: state.realized_pnl for symbol, state in self.symbols.items()}
+        self.symbols, self.open_orders = {}, {}
+        self.account_exposure = self.unrealized_pnl = 0.0
+        for symbol, pnl in realized.items():
+            if pnl:
+                self._symbol(symbol).realized_pnl = pnl
+
+        for position in client.get_open_positions() or []:
+            state = self._symbol(position["symbol"])
+            state.position = float(position["netQuantity"])
+            state.entry_price = float(position["entryPrice"])
+            state.mark_price = float(position["markPrice"])
+            self._refresh_symbol(state, 0.0)
+        # The account total is the sum over symbols, so repeated syncs cannot drift it.
+        self.realized_pnl = sum(state.realized_pnl for state in self.symbols.values())
+
+        for order in client.get_open_orders() or []:
+            if order.get("price"):
+                remaining = float(order["quantity"]) - float(order.get("executedQuantity") or 0)
+                self._add_open_order(order["id"], order["symbol"], remaining * float(order["price"]))
+
+        collateral = client.get_collateral()
+        if collateral and collateral.get("netEquity") is not None:
+            self.equity = float(collateral["netEquity"])
+
+        for symbol in symbols or list(self.symbols):
+            for side in (OrderSide.BUY.value, OrderSide.SELL.value):
+                try:
+                    limit = client.get_max_order_quantity(symbol=symbol, side=side)
+                    self.max_quantity[(symbol, side)] = float(limit["maxOrderQuantity"])
+                except Exception as e:
+                    logging.warning(f"Max order quantity cross-check failed for {symbol} {side}: {e}")
+
+        self.last_sync = time()
+
+    def maybe_sync(self, client, symbols=None):
+        """
+        `sync` if the last one is older than `sync_interval` seconds.
+        """
+        if time() - self.last_sync >= self.sync_interval:
+            self.sync(client, symbols)
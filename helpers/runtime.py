@@ -0,0 +1,282 @@
+import logging
+import multiprocessing
+import queue
+import zlib
+from multiprocessing import shared_memory
+from time import sleep, time
+
+import numpy as np
+
+TICK_DTYPE = np.dtype([("seq", "i8"), ("symbol", "i4"), ("price", "f8"), ("quantity", "f8"), ("timestamp", "f8")])
+_HEADER_BYTES = 64
+
+
+class RingBuffer:
+    """
+    Single-writer, multi-reader ring of market data ticks in shared memory.
+
+    The header holds the number of ticks ever written. Each slot is a seqlock: the writer marks
+    the slot invalid (seq -1), writes the payload and only then stores the slot's sequence number.
+    A reader copies the slots and re-reads their sequence numbers afterwards; a slot whose number
+    was not the expected one both before and after the copy was being rewritten and is dropped.
+    Readers keep their own cursor and skip ahead (counting the loss) if the writer laps them.
+    """
+
+    def __init__(self, capacity: int = 1 << 16, name: str = None):
+        self.capacity = capacity
+        size = _HEADER_BYTES + capacity * TICK_DTYPE.itemsize
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.head = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self.slots = np.ndarray((capacity,), dtype=TICK_DTYPE, buffer=self.shm.buf, offset=_HEADER_BYTES)
+        if self.owner:
+            self.head[0] = 0
+            self.slots["seq"] = -1
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, symbol: int, price: float, quantity: float = 0.0, timestamp: float = None):
+        seq = int(self.head[0])
+        i = seq % self.capacity
+        seqs = self.slots["seq"]
+        seqs[i] = -1  # readers copying this slot from now on will see it invalid
+        self.slots[i] = (-1, symbol, price, quantity, time() if timestamp is None else timestamp)
+        seqs[i] = seq  # publish the slot only after its payload is complete
+        self.head[0] = seq + 1
+
+    def read(self, cursor: int):
+        """
+        Ticks written since `cursor`, as a structured array copy, plus the new cursor and the number of ticks lost.
+        """
+        head = int(self.head[0])
+        lost = 0
+        if head - cursor > self.capacity:
+            lost = head - self.capacity - cursor
+            cursor = head - self.capacity
+        if cursor >= head:
+            return self.slots[:0].copy(), cursor, lost
+
+        expected = np.arange(cursor, head)
+        index = expected % self.capacity
+        ticks = self.slots[index]  # fancy indexing copies
+        # Re-check after the copy: a slot rewritten meanwhile no longer holds the expected number.
+        intact = (ticks["seq"] == expected) & (self.slots["seq"][index] == expected)
+        if not intact.all():
+            lost += int((~intact).sum())
+            ticks = ticks[intact]
+        return ticks, head, lost
+
+    def close(self):
+        # Drop the views first, or SharedMemory.close() refuses while buffers are exported.
+        del self.head, self.slots
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def shard_of(key: str, num_shards: int) -> int:
+    """
+    Stable shard for a symbol or account name (unlike `hash`, the same across processes and runs).
+    """
+    return zlib.crc32(key.encode()) % num_shards
+
+
+def _worker_main(worker_id: int, generation: int, symbols: list, symbol_ids: dict, ring_name: str, capacity: int, strategy, client_factory, account, requests, responses, stop):
+    """
+    Worker process: read ticks for its shard from the ring, run `strategy`, ask the supervisor to approve
+    each order and send approved ones with its own client for `account` (so signing and JSON work stay on this core).
+    """
+    ring = RingBuffer(capacity, name=ring_name)
+    client = client_factory(account)
+    names = {symbol_ids[s]: s for s in symbols}
+    own = np.array(sorted(names), dtype=np.int32)
+    cursor = int(ring.head[0])
+    requests.put(("ready", worker_id, generation, None))
+
+    try:
+        while not stop.is_set():
+            ticks, cursor, lost = ring.read(cursor)
+            if lost:
+                logging.warning(f"Worker {worker_id} fell behind and lost {lost} ticks")
+            ticks = ticks[np.isin(ticks["symbol"], own)]
+            if not len(ticks):
+                sleep(0.0005)
+                continue
+
+            for tick in ticks:
+                order = strategy(names[int(tick["symbol"])], float(tick["price"]), float(tick["quantity"]), float(tick["timestamp"]))
+                if not order:
+                    continue
+                requests.put(("order", worker_id, generation, order))
+                approved, reason = responses.get()
+                if not approved:
+                    logging.info(f"Worker {worker_id} order rejected: {reason}")
+                    continue
+                try:
+                    result = client.execute_order(**order)
+                    requests.put(("fill", worker_id, generation, result))
+                except Exception as e:
+                    requests.put(("error", worker_id, generation, str(e)))
+    finally:
+        ring.close()
+
+
+class ShardedRuntime:
+    """
+    Run a strategy over many symbols on several worker processes.
+
+    Symbols are sharded across `num_workers` processes by `shard_of`. With `accounts`, worker i trades
+    `accounts[i % len(accounts)]` (one worker per account by default). The supervisor (the calling
+    process) publishes market data with `publish`, which workers read from one shared-memory
+    `RingBuffer`. Every order a worker wants to send is approved centrally by `pump` against the
+    optional `risk_engine` (helpers.risk) and the `rate_limiter` order budget (helpers.portfolio),
+    then signed and sent by the worker itself. An approved order's notional is reserved in the risk
+    engine until the worker reports it, so orders approved meanwhile are checked against it; one
+    engine covers all accounts combined. `pump` also restarts workers that died; a restarted
+    worker resumes from the newest tick, and fills the dead worker had not reported yet are lost,
+    so reconcile with `RiskEngine.sync` after a restart.
+
+    `strategy(symbol, price, quantity, timestamp)` returns `execute_order` kwargs or None, and
+    `client_factory(account)` returns the worker's client (`account` is None without `accounts`).
+    Both must be picklable top-level functions.
+    """
+
+    def __init__(self, symbols: list, strategy, client_factory, num_workers: int = None, risk_engine=None, rate_limiter=None, ring_capacity: int = 1 << 16, accounts: list = None):
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.strategy = strategy
+        self.client_factory = client_factory
+        self.accounts = list(accounts) if accounts else None
+        self.num_workers = num_workers or (len(self.accounts) if self.accounts else multiprocessing.cpu_count())
+        self.risk_engine = risk_engine
+        self.rate_limiter = rate_limiter
+        self.ring_capacity = ring_capacity
+
+        self.shards = [[] for _ in range(self.num_workers)]
+        for symbol in self.symbols:
+            self.shards[shard_of(symbol, self.num_workers)].append(symbol)
+
+        self.ring = None
+        self.requests = None
+        self.responses = []
+        self.workers = []
+        self.generations = []
+        self.stop_event = None
+        self.fills = 0
+        self.rejections = 0
+        self.errors = 0
+        self.restarts = 0
+        self.ready = set()  # workers attached to the ring; ticks published before a worker attaches are not seen by it
+
+    def _spawn(self, worker_id: int):
+        process = multiprocessing.Process(
+            target=_worker_main,
+            args=(
+                worker_id, self.generations[worker_id], self.shards[worker_id], self.symbol_ids, self.ring.name, self.ring_capacity,
+                self.strategy, self.client_factory, self.account_of(worker_id), self.requests, self.responses[worker_id], self.stop_event,
+            ),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def account_of(self, worker_id: int):
+        return self.accounts[worker_id % len(self.accounts)] if self.accounts else None
+
+    def start(self):
+        self.ring = RingBuffer(self.ring_capacity)
+        self.requests = multiprocessing.Queue()
+        self.responses = [multiprocessing.Queue() for _ in range(self.num_workers)]
+        self.stop_event = multiprocessing.Event()
+        self.generations = [0] * self.num_workers
+        self.ready = set()
+        self.workers = [self._spawn(i) for i in range(self.num_workers)]
+
+    def wait_ready(self, timeout: float = 30) -> bool:
+        """
+        Pump until every worker has attached to the ring. Returns False on timeout.
+        """
+        deadline = time() + timeout
+        while len(self.ready) < self.num_workers and time() < deadline:
+            self.pump(timeout=0.05)
+        return len(self.ready) == self.num_workers
+
+    def publish(self, symbol: str, price: float, quantity: float = 0.0, timestamp: float = None):
+        self.ring.write(self.symbol_ids[symbol], price, quantity, timestamp)
+
+    def _approve(self, order: dict, reservation):
+        if self.rate_limiter and not self.rate_limiter.try_acquire():
+            return False, "rate limit budget exhausted"
+        if self.risk_engine:
+            try:
+                notional = self.risk_engine.check_order(
+                    order["symbol"], order["side"], quantity=order.get("quantity"), price=order.get("price"),
+                    quoteQuantity=order.get("quoteQuantity"), reduceOnly=order.get("reduceOnly") or False,
+                )
+            except Exception as e:
+                return False, str(e)
+            if notional:
+                self.risk_engine.reserve(reservation, order["symbol"], notional)
+        return True, None
+
+    def _release(self, worker_id: int, generation: int):
+        # Each worker waits for its order's result before asking again, so it holds at most one reservation.
+        if self.risk_engine:
+            self.risk_engine.on_cancel(("pending", worker_id, generation))
+
+    def pump(self, timeout: float = 0.0) -> int:
+        """
+        Answer pending order requests, record fills and restart crashed workers. Returns messages handled.
+        """
+        handled = 0
+        while True:
+            try:
+                # Wait up to `timeout` for the first message only, then drain what is already queued.
+                wait = timeout if handled == 0 else 0.0
+                kind, worker_id, generation, payload = self.requests.get(timeout=wait) if wait else self.requests.get_nowait()
+            except queue.Empty:
+                break
+            handled += 1
+            if kind == "order":
+                if generation != self.generations[worker_id]:
+                    continue  # asked by a worker that has since been restarted
+                approved, reason = self._approve(payload, ("pending", worker_id, generation))
+                self.rejections += not approved
+                self.responses[worker_id].put((approved, reason))
+            elif kind == "ready":
+                if generation == self.generations[worker_id]:
+                    self.ready.add(worker_id)
+            elif kind == "fill":
+                self.fills += 1
+                self._release(worker_id, generation)
+                if self.risk_engine:
+                    self.risk_engine.on_order(payload)
+            else:
+                self.errors += 1
+                self._release(worker_id, generation)
+                logging.error(f"Worker {worker_id} order failed: {payload}")
+
+        for worker_id, process in enumerate(self.workers):
+            if not process.is_alive() and not self.stop_event.is_set():
+                logging.error(f"Worker {worker_id} exited with code {process.exitcode}, restarting")
+                self._release(worker_id, self.generations[worker_id])
+                # A new generation and response queue, so requests left by the dead worker are not answered to its replacement.
+                self.ready.discard(worker_id)
+                self.generations[worker_id] += 1
+                self.responses[worker_id] = multiprocessing.Queue()
+                self.workers[worker_id] = self._spawn(worker_id)
+                self.restarts += 1
+        return handled
+
+    def stop(self, timeout: float = 5):
+        self.stop_event.set()
+        deadline = time() + timeout
+        while any(p.is_alive() for p in self.workers) and time() < deadline:
+            self.pump(timeout=0.05)  # keep answering so no worker blocks on a pending approval
+        for process in self.workers:
+            process.join(timeout=0.1)
+            if process.is_alive():
+                process.terminate()
+        self.ring.close()
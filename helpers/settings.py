@@ -0,0 +1,84 @@
+import json
+from os import path as os_path
+
+
+class SettingsError(Exception):
+    pass
+
+
+# key -> (accepted types, default). A default of ... marks a required key.
+SCHEMA = {
+    "TOTAL_TRADES": (int, ...),
+    "MIN_SLEEP": (int, ...),
+    "MAX_SLEEP": (int, ...),
+    "TRADING_PAIR": (str, ...),
+    "TRADE_SIDE": (str, ...),
+    "LEVERAGE_LIMIT": ((int, float, str), ...),
+    "TRADING_AMOUNT": ((int, float), ...),
+    "LIMIT_PRICE_PERCENTAGE": ((int, float), ...),
+    "STOP_LOSS_USDC": ((int, float), ...),
+    "TAKE_PROFIT_USDC": ((int, float), ...),
+    "AUTO_REPAY_BORROWS": (bool, ...),
+    "TELEGRAM_ALERT": (bool, ...),
+    "MAX_ORDER_USDC": ((int, float), None),
+    "MAX_EXPOSURE_USDC": ((int, float), None),
+    "MAX_LOSS_USDC": ((int, float), None),
+    "TRAILING_STOP_PERCENTAGE": ((int, float), None),
+    "MARK_PRICE_POLL_SECONDS": (int, 5),
+    "CAMPAIGN_BUDGET_USDC": ((int, float), None),
+    "CAMPAIGN_TARGET_VOLUME_USDC": ((int, float), None),
+}
+
+_cache = {}  # path -> (mtime, settings)
+
+
+def _validate(settings: dict, file_path: str) -> dict:
+    errors = []
+    validated = {}
+    for key, (types, default) in SCHEMA.items():
+        value = settings.get(key, default)
+        if value is ...:
+            errors.append(f"{key} is missing")
+            continue
+        # bool is an int subclass; only accept it where bool is the declared type.
+        if value is not None and (not isinstance(value, types) or (isinstance(value, bool) and types is not bool)):
+            errors.append(f"{key} has invalid value {value!r}")
+            continue
+        validated[key] = value
+
+    if not errors:
+        if validated["TRADE_SIDE"] not in ("LONG", "SHORT"):
+            errors.append("TRADE_SIDE must be either 'LONG' or 'SHORT'")
+        if not 0 < validated["LIMIT_PRICE_PERCENTAGE"] <= 100:
+            errors.append("LIMIT_PRICE_PERCENTAGE must be > 0 and <= 100")
+        if not 0 <= validated["MIN_SLEEP"] <= validated["MAX_SLEEP"]:
+            errors.append("MIN_SLEEP must be >= 0 and <= MAX_SLEEP")
+        if validated["TRADING_AMOUNT"] <= 0:
+            errors.append("TRADING_AMOUNT must be > 0")
+        if validated["MARK_PRICE_POLL_SECONDS"] < 1:
+            errors.append("MARK_PRICE_POLL_SECONDS must be >= 1")
+
+    if errors:
+        raise SettingsError(f"Invalid {file_path}: " + "; ".join(errors))
+    # Keep unknown keys so custom settings still reach the caller.
+    return {**settings, **validated}
+
+
+def load_settings(file_path: str = "settings.json") -> dict:
+    """
+    Load and validate settings.json. The parsed result is cached until the file's mtime changes.
+    """
+    mtime = os_path.getmtime(file_path)
+    cached = _cache.get(file_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(file_path, "r") as f:
+        try:
+            settings = json.load(f)
+        except ValueError as e:
+            raise SettingsError(f"Invalid {file_path}: {e}")
+
+    settings = _validate(settings, file_path)
+    _cache[file_path] = (mtime, settings)
+    return settings
